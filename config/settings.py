@@ -92,9 +92,15 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 if not DEBUG:
     CACHES = {
         "default": {
-            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "BACKEND": "tandarunner.cache_backends.DiskCache",
             "LOCATION": "/var/tmp/django_cache",
             "TIMEOUT": 300,
+            "SHARDS": 8,
+            "DATABASE_TIMEOUT": 0.1,
+            "OPTIONS": {
+                "size_limit": 2**30,
+                "eviction_policy": "least-recently-used",
+            },
         }
     }
 else:
@@ -106,9 +112,16 @@ else:
 
 CACHE_TTL_ATHLETE = 3600
 CACHE_TTL_STATS = 3600
-CACHE_TTL_ACTIVITIES_HISTORICAL = 604800
-CACHE_TTL_ACTIVITIES_RECENT = 7200
 CACHE_TTL_VISUALIZATIONS = 300
+CACHE_TTL_CHARTS = 7 * 86400
+CACHE_MAX_STALE_ATHLETE = 86400
+CACHE_MAX_STALE_STATS = 86400
+CACHE_MAX_STALE_VISUALIZATIONS = 86400
+REVALIDATE_WORKERS = 2
+SINGLE_FLIGHT = {
+    "lock_timeout": 60,
+    "poll_interval": 0.1,
+}
 
 # Auth
 
@@ -187,10 +200,74 @@ LOGGING = {
 
 # Strava
 
-STRAVA_BASE_URL = "https://www.strava.com/api/v3"
+STRAVA_BASE_URL = os.getenv("STRAVA_BASE_URL", "https://www.strava.com/api/v3")
+STRAVA_OAUTH_TOKEN_URL = os.getenv(
+    "STRAVA_OAUTH_TOKEN_URL", "https://www.strava.com/oauth/token"
+)
+STRAVA_HTTP_CONFIG = {
+    "timeout": 10.0,
+    "connect_timeout": 5.0,
+    "http2": False,
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 60.0,
+}
+STRAVA_RATE_LIMIT = {
+    "short_limit": 200,
+    "daily_limit": 2000,
+    "background_reserve": 0.2,
+    "max_concurrency": 4,
+    "max_wait_interactive": 30,
+    "max_wait_background": 900,
+    "max_retries": 2,
+    "shared": not DEBUG,
+}
 DUARTE_ATHLETE_ID = 44717295
 DAYS_PER_YEAR = 365
+# Runs are kept one by one for the last YEARS_OF_HISTORY years, as daily
+# rollups before that and as weekly ones after WEEKLY_ROLLUP_AFTER_YEARS.
 YEARS_OF_HISTORY = 3
+WEEKLY_ROLLUP_AFTER_YEARS = 10
+HISTORY_START_YEAR = int(os.getenv("HISTORY_START_YEAR", "2009"))
+MARATHON_TIME_GRID = {
+    "start_hours": 2.5,
+    "stop_hours": 4.5,
+    "step_hours": 0.25,
+    "max_km_day": 50,
+    "km_day_step": 1,
+}
+# Rolling Tanda windows, in weeks; TANDA_WINDOW_WEEKS drives predictions
+# and is always one of them.
+TANDA_ROLLING_WEEKS = [4, 8, 12, 16]
+TANDA_WINDOW_WEEKS = 8
+if TANDA_WINDOW_WEEKS not in TANDA_ROLLING_WEEKS:
+    TANDA_ROLLING_WEEKS = sorted([*TANDA_ROLLING_WEEKS, TANDA_WINDOW_WEEKS])
+# Race name -> distance in km, for the race predictions.
+RACE_DISTANCES_KM = {
+    "5K": 5.0,
+    "10K": 10.0,
+    "Half marathon": 21.0975,
+    "Marathon": 42.195,
+}
+ACTIVITIES_SYNC_INTERVAL = 7200
+ACTIVITIES_SYNC_OVERLAP_DAYS = 3
+# How often a sync refetches every kept activity instead of only the new
+# ones, so deletions and edits of older activities come through.
+ACTIVITIES_RECONCILE_INTERVAL = 7 * 86400
+# "template" fills precompiled Vega-Lite specs, "altair" builds each one.
+CHART_SPEC_MODE = os.getenv("CHART_SPEC_MODE", "template")
+CHART_PROCESS_POOL = {
+    "enabled": os.getenv("CHART_PROCESS_POOL", "FALSE") == "TRUE",
+    "max_workers": int(os.getenv("CHART_PROCESS_POOL_WORKERS", "2")),
+}
+# Largest number of scenarios one predictions API request may evaluate.
+TANDA_PREDICTIONS_MAX_SCENARIOS = 250_000
+# Predictions API requests each user may make per window of `seconds`.
+TANDA_PREDICTIONS_RATE_LIMIT = {"requests": 30, "seconds": 60}
+# Most points drawn per year in the cumulative yearly distance chart.
+CUMULATIVE_POINTS_PER_YEAR = 73
+# Logs the memory held by each dashboard frame as it is built.
+LOG_FRAME_MEMORY = os.getenv("LOG_FRAME_MEMORY", "FALSE") == "TRUE"
 CHAT_EXAMPLES = [
     "Analyze my past 2 weeks of training",
     "What am I doing wrong in my training?",
@@ -0,0 +1,204 @@
+"""
+Benchmarks chart spec generation: Altair at request time vs. precompiled
+spec templates (settings.CHART_SPEC_MODE), and checks both produce the
+same chart for the same data.
+
+Usage:
+    uv run python scripts/benchmark_charts.py
+    uv run python scripts/benchmark_charts.py --years 10 --repeat 50
+    uv run python scripts/benchmark_charts.py --fixtures activities.json
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import pandas  # noqa: E402
+from django.conf import settings  # noqa: E402
+from strava_standin import synthetic_activities  # noqa: E402
+
+from tandarunner.helpers import activities_frame  # noqa: E402
+from tandarunner.history import (  # noqa: E402
+    empty_rollups,
+    lifetime_distance,
+    roll_over,
+)
+from tandarunner.visualizations import (  # noqa: E402
+    _cumulative_yearly_data,
+    _cumulative_yearly_spec,
+    _heatmap_data,
+    _heatmap_spec,
+    _marathon_predictor_data,
+    _marathon_predictor_spec,
+    _race_predictions_data,
+    _race_predictions_spec,
+    _rolling_tanda_data,
+    _rolling_tanda_spec,
+    _spec_template,
+    _weekly_chart_data,
+    _weekly_chart_spec,
+    prepare_activities,
+    prepare_data,
+)
+
+GENERATED_NAME = re.compile(r"^(view|param)_\w+$")
+ISO_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}T")
+
+
+def resolve(text: str):
+    """Inlines named datasets and blanks generated names, so specs from
+    either path compare equal when they draw the same chart."""
+    spec = json.loads(text)
+    datasets = spec.pop("datasets", {})
+
+    def walk(node):
+        if isinstance(node, dict):
+            if set(node) == {"name"} and node["name"] in datasets:
+                return [walk(row) for row in datasets[node["name"]]]
+            return {k: walk(v) for k, v in node.items() if k != "$schema"}
+        if isinstance(node, list):
+            return [walk(v) for v in node]
+        if isinstance(node, str) and GENERATED_NAME.match(node):
+            return "<generated>"
+        return node
+
+    return walk(spec)
+
+
+def same(a, b, path="") -> str | None:
+    """Returns the first path where the specs differ, or None."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        if a.keys() != b.keys():
+            return f"{path} keys {sorted(a.keys() ^ b.keys())}"
+        for k in a:
+            if diff := same(a[k], b[k], f"{path}.{k}"):
+                return diff
+        return None
+    if isinstance(a, list) and isinstance(b, list):
+        if len(a) != len(b):
+            return f"{path} length {len(a)} != {len(b)}"
+        for i, (x, y) in enumerate(zip(a, b)):
+            if diff := same(x, y, f"{path}[{i}]"):
+                return diff
+        return None
+    if isinstance(a, float) or isinstance(b, float):
+        if a is not None and b is not None and math.isclose(a, b):
+            return None
+    if isinstance(a, str) and isinstance(b, str) and ISO_DATETIME.match(a):
+        a = datetime.fromisoformat(a.replace("Z", "+00:00"))
+        b = datetime.fromisoformat(b.replace("Z", "+00:00"))
+    return None if a == b else f"{path}: {a!r} != {b!r}"
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of `fn` in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--fixtures",
+        help="JSON file with a list of recorded Strava activities",
+    )
+    parser.add_argument(
+        "--years", type=int, default=3, help="Years of synthetic history"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        activities = json.loads(Path(args.fixtures).read_text())
+    else:
+        activities = synthetic_activities(args.years, args.seed)
+
+    # Split like the activity store: recent runs one by one, older ones
+    # rolled up per day and week.
+    now = pandas.Timestamp.now(tz="UTC")
+    year = pandas.Timedelta(days=settings.DAYS_PER_YEAR)
+    rollups, recent = roll_over(
+        empty_rollups(),
+        activities_frame(activities),
+        activity_start=now - year * (settings.YEARS_OF_HISTORY - 1),
+        weekly_start=now - year * settings.WEEKLY_ROLLUP_AFTER_YEARS,
+    )
+    runs = prepare_activities(recent)
+    history = lifetime_distance(rollups, runs)
+    weekly_data, daily_df, _ = prepare_data(runs)
+    charts = {
+        "weekly_chart": (_weekly_chart_spec, _weekly_chart_data, weekly_data),
+        "rolling_tanda": (_rolling_tanda_spec, _rolling_tanda_data, daily_df),
+        "running_heatmap": (_heatmap_spec, _heatmap_data, daily_df),
+        "marathon_predictor": (
+            _marathon_predictor_spec,
+            _marathon_predictor_data,
+            daily_df,
+        ),
+        "race_predictions": (
+            _race_predictions_spec,
+            _race_predictions_data,
+            daily_df,
+        ),
+        "cumulative_yearly": (
+            _cumulative_yearly_spec,
+            _cumulative_yearly_data,
+            history,
+        ),
+    }
+
+    print(f"{len(runs)} runs, median of {args.repeat} builds (ms)\n")
+    print(
+        f"{'chart':<20}{'data':>8}{'altair':>10}{'template':>10}"
+        f"{'speedup':>9}{'bytes':>17}  same"
+    )
+    totals = [0.0, 0.0, 0.0]
+    for name, (build, prepare, frame) in charts.items():
+        frames, params = prepare(frame)
+        template = _spec_template(build, tuple(frames), tuple(params))
+        altair_spec = build(frames, params).to_json()
+        template_spec = template.render(frames, params)
+
+        data_ms = timed(lambda: prepare(frame), args.repeat)
+        altair_ms = timed(lambda: build(frames, params).to_json(), args.repeat)
+        template_ms = timed(
+            lambda: template.render(frames, params), args.repeat
+        )
+        for i, ms in enumerate((data_ms, altair_ms, template_ms)):
+            totals[i] += ms
+
+        diff = same(resolve(altair_spec), resolve(template_spec))
+        print(
+            f"{name:<20}{data_ms:>8.1f}{altair_ms:>10.1f}{template_ms:>10.2f}"
+            f"{altair_ms / template_ms:>8.0f}x"
+            f"{len(altair_spec):>8} > {len(template_spec):<6}"
+            f"  {diff or 'yes'}"
+        )
+
+    print(
+        f"{'total':<20}{totals[0]:>8.1f}{totals[1]:>10.1f}"
+        f"{totals[2]:>10.2f}{totals[1] / totals[2]:>8.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = []
+# ///
+"""
+Offline stand-in for the parts of the Strava API that Tanda Runner uses.
+
+Serves /athlete, /athlete/activities, /athletes/{id}/stats and /oauth/token
+from synthetic or recorded activities, with configurable latency,
+pagination limits and rate limiting (429s with X-RateLimit headers).
+Routes match on the path suffix, so any base path works.
+
+Usage:
+    uv run scripts/strava_standin.py --port 8090
+    uv run scripts/strava_standin.py --fixtures activities.json --latency 0.2
+    uv run scripts/strava_standin.py --years 10 --short-limit 100
+
+Then point the app at it:
+    export STRAVA_BASE_URL=http://localhost:8090/api/v3
+    export STRAVA_OAUTH_TOKEN_URL=http://localhost:8090/oauth/token
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ATHLETE_ID = 1
+MAX_PER_PAGE = 200
+SHORT_WINDOW_SECONDS = 15 * 60
+DAILY_WINDOW_SECONDS = 24 * 60 * 60
+
+
+def synthetic_activities(years: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    activities = []
+    for days_ago in range(years * 365, -1, -1):
+        day = now - timedelta(days=days_ago)
+        if rng.random() > 0.6:
+            continue
+
+        is_run = rng.random() < 0.85
+        distance = (
+            rng.uniform(4000, 21000) if is_run else rng.uniform(2e4, 8e4)
+        )
+        pace = rng.uniform(250, 380) if is_run else rng.uniform(100, 160)
+        moving_time = int(distance / 1000 * pace)
+        start = day.replace(
+            hour=rng.randint(6, 19), minute=rng.randint(0, 59), second=0
+        ).replace(microsecond=0)
+        sport_type = "Run" if is_run else "Ride"
+        activities.append(
+            {
+                "id": len(activities) + 1,
+                "name": f"{'Morning' if start.hour < 12 else 'Evening'} {sport_type}",
+                "type": sport_type,
+                "sport_type": sport_type,
+                "start_date": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "start_date_local": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "distance": round(distance, 1),
+                "moving_time": moving_time,
+                "elapsed_time": moving_time + rng.randint(0, 300),
+                "average_speed": round(distance / moving_time, 3),
+                "average_heartrate": round(rng.uniform(130, 170), 1),
+                "max_heartrate": float(rng.randint(170, 190)),
+                "map": {"summary_polyline": "a" * rng.randint(200, 800)},
+                "athlete": {"id": ATHLETE_ID, "resource_state": 1},
+            }
+        )
+    return activities
+
+
+def _timestamp(activity: dict) -> float:
+    return datetime.fromisoformat(
+        activity["start_date"].replace("Z", "+00:00")
+    ).timestamp()
+
+
+class RateLimiter:
+    def __init__(self, short_limit: int, daily_limit: int, fail_rate: float):
+        self.limits = (short_limit, daily_limit)
+        self.windows = (SHORT_WINDOW_SECONDS, DAILY_WINDOW_SECONDS)
+        self.usage = [0, 0]
+        self.window_ids = [-1, -1]
+        self.fail_rate = fail_rate
+        self.lock = threading.Lock()
+
+    def hit(self) -> tuple[bool, dict]:
+        """Counts a request and returns whether it is allowed, plus headers."""
+        now = time.time()
+        with self.lock:
+            for i, seconds in enumerate(self.windows):
+                window_id = int(now // seconds)
+                if window_id != self.window_ids[i]:
+                    self.window_ids[i] = window_id
+                    self.usage[i] = 0
+                self.usage[i] += 1
+            allowed = all(
+                used <= limit for used, limit in zip(self.usage, self.limits)
+            ) and (random.random() >= self.fail_rate)
+            headers = {
+                "X-RateLimit-Limit": ",".join(map(str, self.limits)),
+                "X-RateLimit-Usage": ",".join(map(str, self.usage)),
+            }
+        return allowed, headers
+
+
+def make_handler(
+    activities: list[dict],
+    latency: float,
+    jitter: float,
+    rate_limiter: RateLimiter,
+):
+    activities = sorted(activities, key=_timestamp)
+    timestamps = [_timestamp(act) for act in activities]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload, headers: dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self, method: str) -> None:
+            time.sleep(max(latency + random.uniform(-jitter, jitter), 0))
+            allowed, headers = rate_limiter.hit()
+            if not allowed:
+                self._send_json(
+                    429, {"message": "Rate Limit Exceeded"}, headers
+                )
+                return
+
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            path = url.path.rstrip("/")
+
+            if method == "POST" and path.endswith("/oauth/token"):
+                payload = {
+                    "access_token": f"standin-{time.time_ns()}",
+                    "refresh_token": "standin-refresh",
+                    "expires_in": 21600,
+                    "expires_at": int(time.time()) + 21600,
+                }
+            elif method == "GET" and path.endswith("/athlete/activities"):
+                payload = self._activities(query)
+            elif method == "GET" and path.endswith("/athlete"):
+                payload = {
+                    "id": ATHLETE_ID,
+                    "firstname": "Stand",
+                    "lastname": "In",
+                    "resource_state": 2,
+                }
+            elif method == "GET" and re.search(r"/athletes/\d+/stats$", path):
+                payload = self._stats()
+            else:
+                self._send_json(404, {"message": "Not Found"}, headers)
+                return
+
+            self._send_json(200, payload, headers)
+
+        def _activities(self, query: dict) -> list[dict]:
+            after = float(query.get("after", 0))
+            before = float(query.get("before", time.time()))
+            page = max(int(query.get("page", 1)), 1)
+            per_page = min(int(query.get("per_page", 30)), MAX_PER_PAGE)
+            matching = [
+                act
+                for act, ts in zip(activities, timestamps)
+                if after < ts < before
+            ]
+            return matching[(page - 1) * per_page : page * per_page]
+
+        def _stats(self) -> dict:
+            year_start = datetime(
+                datetime.now(timezone.utc).year, 1, 1, tzinfo=timezone.utc
+            ).timestamp()
+            runs = [
+                act
+                for act, ts in zip(activities, timestamps)
+                if ts >= year_start and act["type"] == "Run"
+            ]
+            return {
+                "ytd_run_totals": {
+                    "count": len(runs),
+                    "distance": sum(act["distance"] for act in runs),
+                    "moving_time": sum(act["moving_time"] for act in runs),
+                    "elapsed_time": sum(act["elapsed_time"] for act in runs),
+                    "elevation_gain": 0,
+                }
+            }
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            self._handle("POST")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Strava stand-in")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument(
+        "--fixtures",
+        help="JSON file with a list of recorded Strava activities",
+    )
+    parser.add_argument(
+        "--years", type=int, default=3, help="Years of synthetic history"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per response"
+    )
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--short-limit", type=int, default=200)
+    parser.add_argument("--daily-limit", type=int, default=2000)
+    parser.add_argument(
+        "--fail-rate",
+        type=float,
+        default=0.0,
+        help="Probability of a random 429",
+    )
+    args = parser.parse_args()
+
+    if args.fixtures:
+        activities = json.loads(Path(args.fixtures).read_text())
+    else:
+        activities = synthetic_activities(args.years, args.seed)
+
+    handler = make_handler(
+        activities,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limiter=RateLimiter(
+            args.short_limit, args.daily_limit, args.fail_rate
+        ),
+    )
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(
+        f"Serving {len(activities)} activities on "
+        f"http://{args.host}:{args.port}/api/v3"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
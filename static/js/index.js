@@ -27,26 +27,35 @@ function getVegaTheme() {
     : "default";
 }
 
+// chart key -> vega-lite spec (JSON string), kept for theme re-renders
+const chartSpecs = {};
+
+function embedChart(key) {
+  const spec = JSON.parse(chartSpecs[key]);
+  spec.background = "transparent";
+  vegaEmbed("#" + key, spec, {
+    renderer: "svg",
+    actions: false,
+    theme: getVegaTheme(),
+  });
+}
+
 function renderVegaCharts() {
   const el = document.getElementById("visualizations");
-  if (!el) return;
-
-  const visualizations = JSON.parse(el.textContent);
-  const vega_theme = getVegaTheme();
-  Object.keys(visualizations).forEach(function (key) {
-    const spec = JSON.parse(visualizations[key]);
-    spec.background = "transparent";
-    vegaEmbed("#" + key, spec, {
-      renderer: "svg",
-      actions: false,
-      theme: vega_theme,
-    });
-  });
+  if (el) Object.assign(chartSpecs, JSON.parse(el.textContent));
+  Object.keys(chartSpecs).forEach(embedChart);
 }
 
 document.addEventListener("htmx:afterSettle", function (event) {
-  if (event.detail.target.id === "tab-graphs") {
+  const target = event.detail.target;
+  if (target.id === "tab-graphs") {
     renderVegaCharts();
+  } else if (target.classList.contains("chart")) {
+    // lazily loaded chart, see templates/partials/chart.html
+    const el = document.getElementById(target.id + "-spec");
+    if (!el) return;
+    chartSpecs[target.id] = JSON.parse(el.textContent);
+    embedChart(target.id);
   }
 });
 
@@ -1,6 +1,19 @@
+import logging
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class TandarunnerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tandarunner"
+
+    def ready(self):
+        from tandarunner.visualizations import get_dummy_visualizations
+
+        # Anonymous landing-page hits all serve the dummy dashboard.
+        try:
+            get_dummy_visualizations()
+        except FileNotFoundError:
+            logger.warning("No dummy dashboard to preload.")
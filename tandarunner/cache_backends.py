@@ -0,0 +1,65 @@
+import threading
+from collections import Counter, defaultdict
+
+from diskcache.djangocache import DjangoCache
+
+
+def key_prefix(key: str) -> str:
+    """Groups keys like `viz-123` or `activities-123` by their prefix."""
+    prefix, separator, _ = key.partition("-")
+    return f"{prefix}-" if separator else "other"
+
+
+class DiskCache(DjangoCache):
+    """Sharded, SQLite-indexed disk cache with per-prefix statistics.
+
+    Built on `diskcache`, so size is capped in bytes (`size_limit`),
+    eviction follows `eviction_policy` and writes are atomic. Hits, misses
+    and writes are counted per key prefix for this process.
+    """
+
+    def __init__(self, directory, params):
+        super().__init__(directory, params)
+        self._stats: defaultdict[str, Counter] = defaultdict(Counter)
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, event: str) -> None:
+        with self._stats_lock:
+            self._stats[key_prefix(key)][event] += 1
+
+    def get(self, key, default=None, *args, **kwargs):
+        value = super().get(key, self._missing_key, *args, **kwargs)
+        if value is self._missing_key:
+            self._count(key, "misses")
+            return default
+        self._count(key, "hits")
+        return value
+
+    def set(self, key, value, *args, **kwargs):
+        self._count(key, "sets")
+        return super().set(key, value, *args, **kwargs)
+
+    def add(self, key, value, *args, **kwargs):
+        added = super().add(key, value, *args, **kwargs)
+        if added:
+            self._count(key, "sets")
+        return added
+
+    def delete(self, key, *args, **kwargs):
+        self._count(key, "deletes")
+        return super().delete(key, *args, **kwargs)
+
+    def prefix_stats(self) -> dict:
+        with self._stats_lock:
+            prefixes = {
+                prefix: dict(counts) for prefix, counts in self._stats.items()
+            }
+        return {
+            "size_bytes": self._cache.volume(),
+            # Each shard reports its share of the configured limit.
+            "size_limit_bytes": round(
+                self._cache.size_limit * len(self._cache._shards)
+            ),
+            "entries": len(self._cache),
+            "prefixes": prefixes,
+        }
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from tandarunner import strava
+from tandarunner.ratelimit import Priority
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _locked(key: str, compute: Callable[[], Any]) -> Any:
+    """Runs `compute` holding a cache-backed lock shared by all workers.
+
+    If the holder dies, the lock expires and waiters compute anyway.
+    """
+    lock_key = f"lock-{key}"
+    token = uuid.uuid4().hex
+    lock_timeout = settings.SINGLE_FLIGHT["lock_timeout"]
+    deadline = time.monotonic() + lock_timeout
+    while not cache.add(lock_key, token, timeout=lock_timeout):
+        if time.monotonic() > deadline:
+            logger.warning(f"Gave up waiting for lock on {key}.")
+            break
+        time.sleep(settings.SINGLE_FLIGHT["poll_interval"])
+
+    try:
+        return compute()
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def single_flight(key: str, compute: Callable[[], Any]) -> Any:
+    """Coalesces concurrent calls for the same key into one computation.
+
+    Callers in this process wait for the leader and share its result.
+    Other workers queue on a cache lock and then run `compute` themselves,
+    so `compute` should first check wherever the leader stores its result.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        logger.info(f"Waiting on in-flight computation for {key}.")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = _locked(key, compute)
+        return flight.result
+    except BaseException as error:
+        flight.error = error
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+class _Entry(NamedTuple):
+    value: Any
+    fresh_until: float
+
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _flights_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.REVALIDATE_WORKERS,
+                thread_name_prefix="revalidate",
+            )
+    return _executor
+
+
+def _refresh(
+    key: str, compute: Callable[[], Any], timeout: int, max_stale: int
+) -> Any:
+    value = compute()
+    cache.set(
+        key,
+        _Entry(value=value, fresh_until=time.time() + timeout),
+        timeout=timeout + max_stale,
+    )
+    return value
+
+
+def _refresh_in_background(
+    key: str, compute: Callable[[], Any], timeout: int, max_stale: int
+) -> None:
+    try:
+        with strava.priority(Priority.BACKGROUND):
+            single_flight(
+                key, lambda: _refresh(key, compute, timeout, max_stale)
+            )
+        logger.info(f"Revalidated {key} in the background.")
+    except Exception:
+        logger.exception(f"Background revalidation of {key} failed.")
+    finally:
+        cache.delete(f"refresh-{key}")
+        close_old_connections()
+
+
+def get_or_revalidate(
+    key: str, compute: Callable[[], Any], timeout: int, max_stale: int
+) -> Any:
+    """Stale-while-revalidate caching.
+
+    Values are fresh for `timeout` seconds. After that the stale value is
+    still returned while a background task recomputes it, until it is
+    `max_stale` seconds past fresh; then it is computed on the request
+    path. Concurrent computations of the same key are coalesced.
+    """
+    entry = cache.get(key)
+    if isinstance(entry, _Entry):
+        if time.time() < entry.fresh_until:
+            logger.info(f"Found {key} in cache.")
+        elif cache.add(
+            f"refresh-{key}", 1, timeout=settings.SINGLE_FLIGHT["lock_timeout"]
+        ):
+            logger.info(f"Serving stale {key}, revalidating.")
+            _get_executor().submit(
+                _refresh_in_background, key, compute, timeout, max_stale
+            )
+        return entry.value
+
+    def compute_once():
+        entry = cache.get(key)
+        if isinstance(entry, _Entry):
+            return entry.value
+        return _refresh(key, compute, timeout, max_stale)
+
+    return single_flight(key, compute_once)
@@ -1,15 +1,37 @@
+import asyncio
+import io
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
-import requests
+import pandas
 from allauth.socialaccount.models import SocialToken
 from django.conf import settings
-from django.core.cache import cache
 from django.utils import timezone
 
+from tandarunner import strava
+from tandarunner.caching import get_or_revalidate, single_flight
+from tandarunner.history import dump_rollups, load_rollups, roll_over
+from tandarunner.metrics import DailyMetrics, daily_totals
+from tandarunner.models import ActivityStore
+
 logger = logging.getLogger(__name__)
 
+# Strings are Arrow-backed ("str"), repeated ones categorical. Floats stay
+# float64 so chart and JSON output keep their exact values.
+ACTIVITY_COLUMNS = {
+    "id": "int64",
+    "name": "str",
+    "type": "category",
+    "sport_type": "category",
+    "start_date": "datetime64[us, UTC]",
+    "start_date_local": "str",
+    "distance": "float64",
+    "moving_time": "int32",
+    "average_speed": "float64",
+    "average_heartrate": "float64",
+    "max_heartrate": "float64",
+}
+
 
 def refresh_token(access_token):
     """Refreshes a user's Strava access token"""
@@ -26,7 +48,7 @@ def refresh_token(access_token):
         "refresh_token": access_token.token_secret,
     }
 
-    response = requests.post("https://www.strava.com/oauth/token", data=params)
+    response = strava.post(settings.STRAVA_OAUTH_TOKEN_URL, data=params)
 
     if response.status_code != 200:
         raise Exception(
@@ -44,25 +66,26 @@ def refresh_token(access_token):
 
 
 def get_athlete(access_token) -> dict:
-    cache_key = f"athlete-{access_token.account.uid}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        logger.info("Found athlete in cache.")
-        return cached
+    return get_or_revalidate(
+        f"athlete-{access_token.account.uid}",
+        lambda: _fetch_athlete(access_token.token),
+        timeout=settings.CACHE_TTL_ATHLETE,
+        max_stale=settings.CACHE_MAX_STALE_ATHLETE,
+    )
 
+
+def _fetch_athlete(token: str) -> dict:
     url = f"{settings.STRAVA_BASE_URL}/athlete"
-    headers = {"Authorization": f"Bearer {access_token.token}"}
-    response = requests.get(url, headers=headers)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = strava.get(url, headers=headers)
 
     if response.status_code != 200:
         raise Exception(
             f"There was an error requesting: {response.status_code}"
         )
 
-    result = response.json()
-    cache.set(cache_key, result, timeout=settings.CACHE_TTL_ATHLETE)
-    logger.info("Fetched and cached athlete profile.")
-    return result
+    logger.info("Fetched athlete profile.")
+    return response.json()
 
 
 def get_access_token(user):
@@ -93,7 +116,9 @@ def get_athlete_data(user) -> dict:
     }
 
 
-def _fetch_activity_chunk(access_token: str, after: int, before: int) -> list:
+async def _afetch_activity_chunk(
+    access_token: str, after: int, before: int
+) -> list:
     url = f"{settings.STRAVA_BASE_URL}/athlete/activities"
     headers = {"Authorization": f"Bearer {access_token}"}
     per_page = 200
@@ -107,7 +132,7 @@ def _fetch_activity_chunk(access_token: str, after: int, before: int) -> list:
             "page": page,
             "per_page": per_page,
         }
-        response = requests.get(url, headers=headers, params=params)
+        response = await strava.aget(url, headers=headers, params=params)
         response.raise_for_status()
         batch = response.json()
 
@@ -123,62 +148,218 @@ def _fetch_activity_chunk(access_token: str, after: int, before: int) -> list:
     return activities
 
 
-def _fetch_historical_activities(access_token: str, year_start: int) -> list:
-    now = datetime.now()
-    chunks = []
-    for i in range(1, settings.YEARS_OF_HISTORY):
-        start = int(
-            (now - timedelta(days=settings.DAYS_PER_YEAR * i)).timestamp()
-        )
-        end = min(
-            int(
-                (
-                    now - timedelta(days=settings.DAYS_PER_YEAR * (i - 1))
-                ).timestamp()
-            ),
-            year_start,
-        )
-        if start < end:
-            chunks.append((start, end))
+def _fetch_activity_chunk(access_token: str, after: int, before: int) -> list:
+    return strava.run(_afetch_activity_chunk(access_token, after, before))
 
-    activities = []
-    with ThreadPoolExecutor() as executor:
-        futures = [
-            executor.submit(_fetch_activity_chunk, access_token, after, before)
+
+async def _afetch_historical_activities(access_token: str, after: int) -> list:
+    """Fetches every activity since `after`, one chunk per year concurrently."""
+    now = int(datetime.now().timestamp())
+    year_seconds = int(timedelta(days=settings.DAYS_PER_YEAR).total_seconds())
+    chunks = [
+        (start, min(start + year_seconds, now))
+        for start in range(after, now, year_seconds)
+    ]
+
+    results = await asyncio.gather(
+        *(
+            _afetch_activity_chunk(access_token, after, before)
             for after, before in chunks
-        ]
-        for future in as_completed(futures):
-            activities.extend(future.result())
+        )
+    )
+    activities = [act for chunk in results for act in chunk]
 
     logger.info(f"Fetched {len(activities)} historical activities.")
     return activities
 
 
-def fetch_all_activities(access_token: str, athlete_id: int) -> list:
-    now = datetime.now()
-    year_start = int(datetime(now.year, 1, 1).timestamp())
+def _fetch_historical_activities(access_token: str, after: int) -> list:
+    return strava.run(_afetch_historical_activities(access_token, after))
+
+
+def activities_frame(activities: list[dict]) -> pandas.DataFrame:
+    """Keeps only the activity columns the app uses, with compact dtypes."""
+    df = pandas.DataFrame(activities, columns=list(ACTIVITY_COLUMNS))
+    df["start_date"] = pandas.to_datetime(df["start_date"], utc=True)
+    return df.astype(ACTIVITY_COLUMNS)
+
+
+def dump_activities(df: pandas.DataFrame) -> bytes:
+    """Serializes activities as a zstd-compressed Parquet blob."""
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False, compression="zstd")
+    return buffer.getvalue()
+
+
+def load_activities(blob: bytes | None) -> pandas.DataFrame:
+    if not blob:
+        return activities_frame([])
+    return pandas.read_parquet(io.BytesIO(blob))
+
+
+def _merge_activities(
+    existing: pandas.DataFrame, new: pandas.DataFrame
+) -> pandas.DataFrame:
+    """Merges activities by id, keeping the newest copy."""
+    merged = pandas.concat([existing, new], ignore_index=True)
+    merged = merged.drop_duplicates(subset="id", keep="last")
+    # Categoricals with different categories concatenate to strings.
+    return merged.astype(ACTIVITY_COLUMNS).sort_values(
+        "start_date", ignore_index=True
+    )
 
-    historical_key = f"activities-historical-{athlete_id}"
-    historical = cache.get(historical_key)
-    if historical is None:
-        historical = _fetch_historical_activities(
-            access_token, year_start=year_start
+
+def fetch_all_activities(
+    access_token: str, athlete_id: int
+) -> pandas.DataFrame:
+    """Returns the athlete's activities from the persistent store, asking
+    Strava only for what happened after the store's high-water mark."""
+    return single_flight(
+        f"activities-{athlete_id}",
+        lambda: _sync_activities(access_token, athlete_id),
+    )
+
+
+def _sync_activities(access_token: str, athlete_id: int) -> pandas.DataFrame:
+    store, _ = ActivityStore.objects.get_or_create(athlete_id=athlete_id)
+    now = timezone.now()
+    sync_interval = timedelta(seconds=settings.ACTIVITIES_SYNC_INTERVAL)
+    if store.synced_at is not None and now - store.synced_at < sync_interval:
+        logger.info("Found activities in store.")
+        return load_activities(store.activities)
+
+    history_span = timedelta(
+        days=settings.DAYS_PER_YEAR * (settings.YEARS_OF_HISTORY - 1)
+    )
+    history_start = now - history_span
+    weekly_start = now - timedelta(
+        days=settings.DAYS_PER_YEAR * settings.WEEKLY_ROLLUP_AFTER_YEARS
+    )
+    rolled_until = (
+        None if store.synced_at is None else store.synced_at - history_span
+    )
+    reconcile_interval = timedelta(
+        seconds=settings.ACTIVITIES_RECONCILE_INTERVAL
+    )
+    existing = load_activities(store.activities)
+    after = None
+    if store.latest_start_date is None:
+        lifetime_start = pandas.Timestamp(
+            year=settings.HISTORY_START_YEAR, month=1, day=1, tz="UTC"
         )
-        cache.set(
-            historical_key,
-            historical,
-            timeout=settings.CACHE_TTL_ACTIVITIES_HISTORICAL,
+        new = _fetch_historical_activities(
+            access_token, after=int(lifetime_start.timestamp())
         )
-
-    recent_key = f"activities-recent-{athlete_id}"
-    recent = cache.get(recent_key)
-    if recent is None:
-        recent = _fetch_activity_chunk(
-            access_token, after=year_start, before=int(now.timestamp())
+        store.reconciled_at = now
+    elif (
+        store.reconciled_at is None
+        or now - store.reconciled_at >= reconcile_interval
+    ):
+        # Refetch every activity not rolled up yet and replace the stored
+        # ones, so deleted, private and edited activities come through.
+        # Rollups from before the previous sync stay as they are.
+        reconcile_start = pandas.Timestamp(
+            rolled_until or history_start
+        ).normalize()
+        new = _fetch_historical_activities(
+            access_token, after=int(reconcile_start.timestamp())
+        )
+        existing = activities_frame([])
+        store.reconciled_at = now
+    else:
+        # Overlap a few days so late uploads of older activities are not
+        # missed, duplicates are dropped by id when merging.
+        after = store.latest_start_date - timedelta(
+            days=settings.ACTIVITIES_SYNC_OVERLAP_DAYS
         )
-        cache.set(
-            recent_key, recent, timeout=settings.CACHE_TTL_ACTIVITIES_RECENT
+        new = _fetch_activity_chunk(
+            access_token,
+            after=int(after.timestamp()),
+            before=int(now.timestamp()),
         )
-        logger.info(f"Fetched {len(recent)} recent activities.")
+        logger.info(f"Fetched {len(new)} new activities.")
+
+    merged = _merge_activities(existing, activities_frame(new))
+    if merged.empty:
+        # Nothing came back: mark this sync's end, so the next one doesn't
+        # fetch the whole history again.
+        store.latest_start_date = now
+    else:
+        # Runs from before the kept years are rolled up below, and never
+        # rolled up twice, so there is no point in fetching them again.
+        latest = merged.iloc[-1]
+        store.latest_start_date = max(
+            latest["start_date"].to_pydatetime(), history_start
+        )
+        store.latest_activity_id = int(latest["id"])
+
+    # Only the recent years are kept one activity at a time, older runs
+    # are folded into the rollups, so long histories stay small.
+    rollups, activities = roll_over(
+        load_rollups(store.rollups),
+        merged,
+        activity_start=history_start,
+        weekly_start=weekly_start,
+        rolled_until=rolled_until,
+    )
+    store.activities = dump_activities(activities)
+    store.rollups = dump_rollups(rollups)
+    store.daily_metrics = _sync_daily_metrics(
+        store.daily_metrics,
+        activities,
+        since=after,
+        history_start=history_start,
+    ).dumps()
+    store.synced_at = now
+    store.save()
+    logger.info(f"Stored {len(activities)} activities.")
+
+    return activities
+
+
+def _sync_daily_metrics(
+    blob: bytes | None,
+    activities: pandas.DataFrame,
+    since: datetime | None,
+    history_start: datetime,
+) -> DailyMetrics:
+    """Brings the stored daily metrics up to date with `activities`.
 
-    return historical + recent
+    After a delta sync only the days from `since` on can have changed, so
+    just those are recomputed; a full sync or a change of
+    `settings.TANDA_ROLLING_WEEKS` recomputes everything. Either way the
+    stored frame is copied and written back whole, a row per kept day.
+    """
+    windows = tuple(settings.TANDA_ROLLING_WEEKS)
+    runs = activities[activities["type"] == "Run"]
+    metrics = DailyMetrics.loads(blob, windows)
+    if metrics is None or since is None:
+        return DailyMetrics.compute(daily_totals(runs), windows)
+
+    day = pandas.Timestamp(since).tz_convert("UTC").normalize()
+    recent = runs.iloc[runs["start_date"].searchsorted(day) :]
+    metrics = metrics.update(daily_totals(recent), since=day.tz_localize(None))
+    # Days that fell out of the stored history go, like their activities.
+    first_day = pandas.Timestamp(history_start).tz_convert("UTC").normalize()
+    return metrics.trim(first_day.tz_localize(None))
+
+
+def load_daily_metrics(athlete_id: int) -> DailyMetrics | None:
+    """The athlete's stored daily metrics, as left by the last sync."""
+    blob = (
+        ActivityStore.objects.filter(athlete_id=athlete_id)
+        .values_list("daily_metrics", flat=True)
+        .first()
+    )
+    return DailyMetrics.loads(blob, tuple(settings.TANDA_ROLLING_WEEKS))
+
+
+def load_history(athlete_id: int) -> pandas.DataFrame:
+    """The athlete's runs from before the activities kept in the store,
+    as rolled up by the last sync."""
+    blob = (
+        ActivityStore.objects.filter(athlete_id=athlete_id)
+        .values_list("rollups", flat=True)
+        .first()
+    )
+    return load_rollups(blob)
@@ -0,0 +1,141 @@
+import io
+
+import numpy
+import pandas
+
+ROLLUP_COLUMNS = {
+    "distance_meters": "float64",
+    "time_seconds": "int64",
+    "runs": "int32",
+    "days": "int16",
+}
+
+
+def empty_rollups() -> pandas.DataFrame:
+    frame = pandas.DataFrame(
+        {column: [] for column in ROLLUP_COLUMNS},
+        index=pandas.DatetimeIndex([], dtype="datetime64[us]", name="date"),
+    )
+    return frame.astype(ROLLUP_COLUMNS)
+
+
+def _day(timestamp) -> pandas.Timestamp:
+    """Start of the UTC day `timestamp` falls on."""
+    return pandas.Timestamp(timestamp).tz_convert("UTC").normalize()
+
+
+def _bin_start(dates: pandas.DatetimeIndex) -> pandas.DatetimeIndex:
+    """Start of each date's week bin. Bins count 7 days from January 1st,
+    so they never cross into the next year."""
+    offset = (dates.dayofyear - 1) // 7 * 7
+    return dates.to_period("Y").start_time + pandas.to_timedelta(
+        offset, unit="D"
+    )
+
+
+def _combine(*frames: pandas.DataFrame) -> pandas.DataFrame:
+    """Sums rollups that share a period."""
+    combined = (
+        pandas.concat(frames)
+        .groupby(level=0)
+        .agg(
+            {
+                "distance_meters": "sum",
+                "time_seconds": "sum",
+                "runs": "sum",
+                "days": "max",
+            }
+        )
+    )
+    return combined.astype(ROLLUP_COLUMNS)
+
+
+def daily_rollup(runs: pandas.DataFrame) -> pandas.DataFrame:
+    """One row per (UTC) day with runs."""
+    days = (
+        pandas.DatetimeIndex(runs["start_date"]).tz_convert(None).normalize()
+    )
+    frame = pandas.DataFrame(
+        {
+            "distance_meters": runs["distance"].to_numpy(float),
+            "time_seconds": runs["moving_time"].to_numpy("int64"),
+            "runs": 1,
+            "days": 1,
+        },
+        index=days.rename("date"),
+    )
+    return _combine(empty_rollups(), frame)
+
+
+def weekly_rollup(daily: pandas.DataFrame) -> pandas.DataFrame:
+    """Folds daily rows into week bins, see `_bin_start`."""
+    starts = _bin_start(daily.index)
+    year_days = numpy.where(starts.is_leap_year, 366, 365)
+    frame = daily.set_axis(starts.rename("date")).assign(
+        days=numpy.minimum(7, year_days - starts.dayofyear + 1)
+    )
+    return _combine(empty_rollups(), frame)
+
+
+def roll_over(
+    rollups: pandas.DataFrame,
+    activities: pandas.DataFrame,
+    activity_start,
+    weekly_start,
+    rolled_until=None,
+) -> tuple[pandas.DataFrame, pandas.DataFrame]:
+    """Moves whole days of runs older than `activity_start` out of
+    `activities` into daily rollups, and daily rollups older than
+    `weekly_start` into weekly ones.
+
+    Runs older than `rolled_until`, the `activity_start` of the previous
+    roll over, are already in `rollups` and aren't added again, so runs
+    fetched twice are only counted once.
+
+    Returns the new rollups and the activities that are kept. Activities
+    other than runs are dropped once they are rolled over.
+    """
+    cut = _day(activity_start)
+    old = activities["start_date"] < cut
+    to_roll = old & (activities["type"] == "Run")
+    if rolled_until is not None:
+        to_roll &= activities["start_date"] >= _day(rolled_until)
+    old_runs = activities[to_roll]
+
+    daily = _combine(rollups, daily_rollup(old_runs))
+    weekly_day = _day(weekly_start).tz_localize(None)
+    weekly_cut = _bin_start(pandas.DatetimeIndex([weekly_day]))[0]
+    to_fold = (daily.index < weekly_cut) & (daily["days"] == 1)
+    rollups = _combine(
+        daily[~to_fold], weekly_rollup(daily[to_fold])
+    ).sort_index()
+    return rollups, activities[~old].reset_index(drop=True)
+
+
+def lifetime_distance(
+    rollups: pandas.DataFrame, runs: pandas.DataFrame
+) -> pandas.DataFrame:
+    """Run distance per period over the athlete's whole history, from the
+    rollups and the `runs` kept at activity granularity.
+
+    Each row is dated on the last day of its period, so cumulative sums
+    reach a week's distance at the end of that week.
+    """
+    frame = _combine(rollups, daily_rollup(runs))
+    dates = frame.index + pandas.to_timedelta(frame["days"] - 1, unit="D")
+    return pandas.DataFrame(
+        {"distance_meters": frame["distance_meters"].to_numpy()},
+        index=dates.rename("date"),
+    )
+
+
+def dump_rollups(rollups: pandas.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    rollups.to_parquet(buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+def load_rollups(blob: bytes | memoryview | None) -> pandas.DataFrame:
+    if not blob:
+        return empty_rollups()
+    return pandas.read_parquet(io.BytesIO(blob))
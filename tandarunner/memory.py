@@ -0,0 +1,36 @@
+import logging
+import resource
+from collections.abc import Mapping
+from typing import Any
+
+import pandas
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def frame_bytes(frame: pandas.DataFrame) -> int:
+    """Memory held by `frame`, including the contents of its strings."""
+    return int(frame.memory_usage(deep=True).sum())
+
+
+def log_frame_memory(label: str, frames: Mapping[str, Any]) -> None:
+    """Logs the bytes held by each DataFrame in `frames` and the process'
+    peak RSS, when `settings.LOG_FRAME_MEMORY` is on. Other values are
+    skipped, so a whole `DashboardData` can be passed."""
+    if not settings.LOG_FRAME_MEMORY:
+        return
+    sizes = {
+        name: frame_bytes(frame)
+        for name, frame in frames.items()
+        if isinstance(frame, pandas.DataFrame)
+    }
+    listed = ", ".join(
+        f"{name} {size / 1024:.1f} KiB" for name, size in sizes.items()
+    )
+    # ru_maxrss is in KiB on Linux.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    logger.info(
+        f"{label} frames: {listed}; total "
+        f"{sum(sizes.values()) / 1024:.1f} KiB, peak RSS {peak_rss:.0f} MiB"
+    )
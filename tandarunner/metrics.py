@@ -0,0 +1,183 @@
+import io
+from datetime import timedelta
+
+import numpy
+import pandas
+
+TOTALS = ["distance_meters", "time_seconds"]
+CUMULATIVE = [f"cumulative_{column}" for column in TOTALS]
+
+
+def daily_totals(runs: pandas.DataFrame) -> pandas.DataFrame:
+    """Distance and moving time of `runs` summed per (UTC) day."""
+    df = pandas.DataFrame(
+        {
+            "distance_meters": runs["distance"].to_numpy(float),
+            "time_seconds": runs["moving_time"].to_numpy("int64"),
+        },
+        index=pandas.DatetimeIndex(runs["start_date"]),
+    )
+    totals = df.groupby(df.index.tz_localize(None).normalize()).sum()
+    totals.index.name = "date"
+    return totals
+
+
+def rolling_sums(
+    dates: numpy.ndarray, values: numpy.ndarray, windows_days: numpy.ndarray
+) -> numpy.ndarray:
+    """Trailing-window sums of `values` rows, for several windows at once.
+
+    `dates` is sorted and `values` has one row per date. The window for
+    date t is (t - days, t], like pandas' time-based `rolling`. Returns an
+    array of shape (windows, dates, columns).
+    """
+    cumulative = numpy.zeros((len(values) + 1, values.shape[1]))
+    numpy.cumsum(values, axis=0, out=cumulative[1:])
+    starts = dates - numpy.asarray(windows_days)[:, None] * numpy.timedelta64(
+        1, "D"
+    )
+    left = numpy.searchsorted(dates, starts, side="right")
+    return cumulative[1:] - cumulative[left]
+
+
+def _columns(
+    frame: pandas.DataFrame, columns: list[str], start=None, stop=None
+) -> numpy.ndarray:
+    """Rows `start:stop` of `columns` as a float array, without copying the
+    whole frame like selecting the columns would."""
+    return numpy.column_stack(
+        [frame[column].to_numpy(float)[start:stop] for column in columns]
+    )
+
+
+def _base(frame: pandas.DataFrame) -> numpy.ndarray:
+    """Running totals before the first row of metrics `frame`."""
+    if frame.empty:
+        return numpy.zeros((1, len(TOTALS)))
+    return _columns(frame, CUMULATIVE, 0, 1) - _columns(frame, TOTALS, 0, 1)
+
+
+class DailyMetrics:
+    """An athlete's daily run totals with their rolling-window sums.
+
+    `frame` is indexed by day and holds the totals, their cumulative sums
+    and, per window of `weeks`, the totals summed over (day - window, day]
+    as `<total>_<weeks>w`. `update` replaces the most recent days and only
+    recomputes those, reading back at most one window of history. The
+    arithmetic is O(window), but the updated frame is still a new copy of
+    every stored day, so an update is O(history) in memory copies, and so
+    is `dumps`, which writes the whole frame again.
+    """
+
+    def __init__(self, frame: pandas.DataFrame, windows: tuple[int, ...]):
+        self.frame = frame
+        self.windows = windows
+
+    @classmethod
+    def columns(cls, windows: tuple[int, ...]) -> list[str]:
+        return [
+            *TOTALS,
+            *CUMULATIVE,
+            *(f"{total}_{weeks}w" for weeks in windows for total in TOTALS),
+        ]
+
+    @classmethod
+    def compute(
+        cls, totals: pandas.DataFrame, windows: tuple[int, ...]
+    ) -> "DailyMetrics":
+        """Full recompute from `daily_totals`, the reference for `update`."""
+        values = _columns(totals, TOTALS)
+        sums = rolling_sums(
+            totals.index.to_numpy(), values, numpy.array(windows) * 7
+        )
+        cumulative = numpy.cumsum(values, axis=0)
+        frame = cls._frame(totals.index, windows, values, cumulative, sums)
+        return cls(frame, windows)
+
+    def update(
+        self, totals: pandas.DataFrame, since: pandas.Timestamp
+    ) -> "DailyMetrics":
+        """Returns the metrics with every day from `since` on replaced by
+        `totals`, which must cover all runs from that day on."""
+        index = self.frame.index
+        totals = totals.loc[since:]
+        values = _columns(totals, TOTALS)
+        dates = totals.index.to_numpy()
+        window_days = numpy.array(self.windows) * 7
+
+        # Stored rows older than the longest window can't fall in any new
+        # window; only the one just before them is read, for the running
+        # totals up to there. Before the first stored row they are that
+        # row's, less its own totals, which isn't 0 once days were trimmed.
+        position = index.searchsorted(since.to_datetime64())
+        start = index.searchsorted(
+            (since - timedelta(days=int(window_days.max()))).to_datetime64(),
+            side="right",
+        )
+        stored = _columns(self.frame, CUMULATIVE, max(start - 1, 0), position)
+        if start == 0:
+            stored = numpy.vstack([_base(self.frame), stored])
+        new_cumulative = stored[-1] + numpy.cumsum(values, axis=0)
+
+        # cumulative[i] is the running total before all_dates[i].
+        all_dates = numpy.concatenate([index[start:position], dates])
+        cumulative = numpy.vstack([stored, new_cumulative])
+        starts = dates - window_days[:, None] * numpy.timedelta64(1, "D")
+        left = numpy.searchsorted(all_dates, starts, side="right")
+        sums = new_cumulative - cumulative[left]
+
+        rows = self._frame(
+            totals.index, self.windows, values, new_cumulative, sums
+        )
+        return DailyMetrics(
+            pandas.concat([self.frame.iloc[:position], rows]), self.windows
+        )
+
+    def trim(self, first_day: pandas.Timestamp) -> "DailyMetrics":
+        """Drops the days before `first_day`, rebasing the cumulative sums
+        to start there as if those days had never been recorded."""
+        start = self.frame.index.searchsorted(first_day.to_datetime64())
+        if start == 0:
+            return self
+        frame = self.frame.iloc[start:].copy()
+        if not frame.empty:
+            frame[CUMULATIVE] -= _base(frame)
+        return DailyMetrics(frame, self.windows)
+
+    @classmethod
+    def _frame(
+        cls,
+        index: pandas.DatetimeIndex,
+        windows: tuple[int, ...],
+        values: numpy.ndarray,
+        cumulative: numpy.ndarray,
+        sums: numpy.ndarray,
+    ) -> pandas.DataFrame:
+        # (windows, days, totals) -> one <total>_<weeks>w column each.
+        sums = sums.transpose(1, 0, 2).reshape(
+            len(index), len(windows) * len(TOTALS)
+        )
+        frame = pandas.DataFrame(
+            numpy.hstack([values, cumulative, sums]),
+            index=index,
+            columns=cls.columns(windows),
+        )
+        frame["time_seconds"] = frame["time_seconds"].astype("int64")
+        return frame
+
+    def dumps(self) -> bytes:
+        buffer = io.BytesIO()
+        self.frame.to_parquet(buffer, compression="zstd")
+        return buffer.getvalue()
+
+    @classmethod
+    def loads(
+        cls, blob: bytes | memoryview | None, windows: tuple[int, ...]
+    ) -> "DailyMetrics | None":
+        """Reads stored metrics, or None if there are none for `windows`."""
+        if not blob:
+            return None
+        frame = pandas.read_parquet(io.BytesIO(blob))
+        if list(frame.columns) != cls.columns(windows):
+            return None
+        return cls(frame, windows)
@@ -0,0 +1,39 @@
+# Generated by Django 5.1b1 on 2026-10-17 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tandarunner", "0005_remove_trainingplan_goal_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivityStore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("athlete_id", models.BigIntegerField(unique=True)),
+                ("activities", models.JSONField(default=list)),
+                (
+                    "latest_start_date",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                (
+                    "latest_activity_id",
+                    models.BigIntegerField(blank=True, null=True),
+                ),
+                ("synced_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def reset_high_water_marks(apps, schema_editor):
+    # Stored activities are dropped with the old JSON column, so every
+    # athlete gets one full resync into the Parquet column.
+    ActivityStore = apps.get_model("tandarunner", "ActivityStore")
+    ActivityStore.objects.update(
+        latest_start_date=None, latest_activity_id=None, synced_at=None
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tandarunner", "0006_activitystore"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="activitystore",
+            name="activities",
+        ),
+        migrations.AddField(
+            model_name="activitystore",
+            name="activities",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(
+            reset_high_water_marks, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tandarunner", "0007_activitystore_parquet"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activitystore",
+            name="daily_metrics",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
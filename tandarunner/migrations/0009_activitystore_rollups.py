@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+def reset_high_water_marks(apps, schema_editor):
+    # Stores only hold the last few years, so every athlete gets one full
+    # resync to fetch and roll up the rest of their history.
+    ActivityStore = apps.get_model("tandarunner", "ActivityStore")
+    ActivityStore.objects.update(
+        latest_start_date=None, latest_activity_id=None, synced_at=None
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tandarunner", "0008_activitystore_daily_metrics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activitystore",
+            name="rollups",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(
+            reset_high_water_marks, migrations.RunPython.noop
+        ),
+    ]
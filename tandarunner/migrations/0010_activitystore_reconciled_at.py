@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tandarunner", "0009_activitystore_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activitystore",
+            name="reconciled_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
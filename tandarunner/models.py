@@ -20,3 +20,19 @@ class TrainingPlan(models.Model):
 
     def __str__(self):
         return f"{self.user} — {self.name}"
+
+
+class ActivityStore(models.Model):
+    athlete_id = models.BigIntegerField(unique=True)
+    activities = models.BinaryField(null=True, blank=True)
+    daily_metrics = models.BinaryField(null=True, blank=True)
+    rollups = models.BinaryField(null=True, blank=True)
+    latest_start_date = models.DateTimeField(null=True, blank=True)
+    latest_activity_id = models.BigIntegerField(null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.athlete_id} — synced {self.synced_at}"
@@ -0,0 +1,61 @@
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+import django
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def _init_worker() -> None:
+    # Workers start from a fresh interpreter (forkserver) and inherit
+    # DJANGO_SETTINGS_MODULE from the environment.
+    django.setup()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.CHART_PROCESS_POOL["max_workers"],
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_worker,
+            )
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_cpu_bound(fn: Callable[..., Any], *args: Any) -> Any:
+    """Runs `fn(*args)` in the chart process pool, if enabled.
+
+    Keeps pandas and Altair work from holding this process's GIL, which
+    would otherwise stall every websocket served by the same worker.
+    `fn` and its arguments must be picklable, so pass module-level
+    functions and plain data. Without the pool it runs inline.
+    """
+    if not settings.CHART_PROCESS_POOL["enabled"]:
+        return fn(*args)
+
+    pool = _get_pool()
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        logger.exception("Chart process pool broke, running inline.")
+        _discard_pool(pool)
+        return fn(*args)
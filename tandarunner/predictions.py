@@ -0,0 +1,88 @@
+import numpy
+from numpy.typing import ArrayLike
+
+MARATHON_KM = 42.195
+# Riegel's fatigue exponent for running, from his 1981 paper.
+RIEGEL_EXPONENT = 1.06
+
+
+def get_tanda_value(
+    km_per_week: ArrayLike, pace_sec_per_km: ArrayLike
+) -> numpy.ndarray:
+    km_per_week = numpy.asarray(km_per_week, dtype="float64")
+    pace_sec_per_km = numpy.asarray(pace_sec_per_km, dtype="float64")
+    marathon_pace_sec_per_km = (
+        17.1
+        + 140.0 * numpy.exp(-0.0053 * km_per_week)
+        + 0.55 * pace_sec_per_km
+    )
+    total_marathon_time_secs = MARATHON_KM * marathon_pace_sec_per_km
+    total_marathon_time_hours = total_marathon_time_secs / 3600
+    return total_marathon_time_hours
+
+
+def get_pace_for_distance(
+    km_per_week: ArrayLike, total_marathon_time_hours: ArrayLike
+) -> numpy.ndarray:
+    km_per_week = numpy.asarray(km_per_week, dtype="float64")
+    total_marathon_time_hours = numpy.asarray(
+        total_marathon_time_hours, dtype="float64"
+    )
+    marathon_pace_sec_per_km = total_marathon_time_hours * 3600 / MARATHON_KM
+    pace_sec_per_km = (
+        marathon_pace_sec_per_km
+        - 17.1
+        - 140.0 * numpy.exp(-0.0053 * km_per_week)
+    ) / 0.55
+    return pace_sec_per_km
+
+
+def predict_races(
+    marathon_time_hours: ArrayLike,
+    distances_km: ArrayLike,
+    exponent: float = RIEGEL_EXPONENT,
+) -> numpy.ndarray:
+    """Race times, in hours, over each of `distances_km`.
+
+    Tanda predicts the marathon and Riegel's formula, t = T * (d / D) **
+    exponent, carries it to other distances. All predictions and
+    distances are broadcast at once, to shape
+    `(*marathon_time_hours.shape, len(distances_km))`.
+    """
+    distances_km = numpy.asarray(distances_km, dtype="float64")
+    ratios = (distances_km / MARATHON_KM) ** exponent
+    marathon_time_hours = numpy.asarray(marathon_time_hours, dtype="float64")
+    return marathon_time_hours[..., None] * ratios
+
+
+def predict_tanda(
+    km_per_week: ArrayLike,
+    pace_sec_per_km: ArrayLike | None = None,
+    marathon_time_hours: ArrayLike | None = None,
+    grid: bool = False,
+) -> dict[str, numpy.ndarray]:
+    """Evaluates the Tanda model for many scenarios in one call.
+
+    Given training paces it predicts marathon times, given marathon times
+    it returns the training pace each one needs, or both. Inputs are
+    broadcast against each other, or with `grid` crossed, with weekly
+    km along the first axis.
+    """
+    km_per_week = numpy.asarray(km_per_week, dtype="float64")
+    if grid:
+        km_per_week = km_per_week.reshape(-1, 1)
+
+    def other(values: ArrayLike) -> numpy.ndarray:
+        values = numpy.asarray(values, dtype="float64")
+        return values.reshape(1, -1) if grid else values
+
+    results = {}
+    if pace_sec_per_km is not None:
+        results["marathon_time_hours"] = get_tanda_value(
+            km_per_week, other(pace_sec_per_km)
+        )
+    if marathon_time_hours is not None:
+        results["pace_sec_per_km"] = get_pace_for_distance(
+            km_per_week, other(marathon_time_hours)
+        )
+    return results
@@ -0,0 +1,200 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "strava-ratelimit"
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+@dataclass
+class Window:
+    """A Strava rate-limit window, reset on wall-clock boundaries (UTC)."""
+
+    name: str
+    seconds: int
+    limit: int
+    usage: int = 0
+    window_id: int = -1
+
+    def roll(self, now: float) -> None:
+        window_id = int(now // self.seconds)
+        if window_id != self.window_id:
+            self.window_id = window_id
+            self.usage = 0
+
+    def seconds_to_reset(self, now: float) -> float:
+        return self.seconds - now % self.seconds
+
+    @property
+    def cache_key(self) -> str:
+        return f"{CACHE_KEY_PREFIX}-{self.name}-{self.window_id}"
+
+
+class RateLimitScheduler:
+    """Token-bucket scheduler for every Strava request in the process.
+
+    Budgets are seeded from settings and corrected from the
+    `X-RateLimit-Limit` / `X-RateLimit-Usage` headers of each response.
+    Background requests leave a reserve of the budget for interactive
+    ones and always queue behind them for a connection slot. With
+    `shared` enabled, usage is also counted in the cache backend so every
+    worker process draws from the same budget.
+
+    Must be used from a single event loop (the Strava client loop).
+    """
+
+    def __init__(self, config: dict):
+        self.windows = [
+            Window("short", 15 * 60, config["short_limit"]),
+            Window("daily", 24 * 60 * 60, config["daily_limit"]),
+        ]
+        self.background_reserve = config["background_reserve"]
+        self.max_concurrency = config["max_concurrency"]
+        self.max_wait = {
+            Priority.INTERACTIVE: config["max_wait_interactive"],
+            Priority.BACKGROUND: config["max_wait_background"],
+        }
+        self.shared = config["shared"]
+        self.in_flight = 0
+        self.deferred = 0
+        self._waiters: list = []
+        self._sequence = itertools.count()
+
+    def _usage(self, window: Window, now: float) -> int:
+        window.roll(now)
+        if self.shared:
+            window.usage = max(window.usage, cache.get(window.cache_key, 0))
+        return window.usage
+
+    def _wait_time(self, priority: Priority, now: float) -> float:
+        for window in self.windows:
+            limit = window.limit
+            if priority is Priority.BACKGROUND:
+                limit = int(limit * (1 - self.background_reserve))
+            if self._usage(window, now) >= limit:
+                return window.seconds_to_reset(now)
+        return 0.0
+
+    def _consume(self) -> None:
+        for window in self.windows:
+            window.usage += 1
+            if self.shared:
+                cache.add(window.cache_key, 0, timeout=window.seconds)
+                try:
+                    window.usage = max(
+                        window.usage, cache.incr(window.cache_key)
+                    )
+                except ValueError:
+                    pass
+
+    async def _wait_for_budget(self, priority: Priority) -> None:
+        deadline = time.monotonic() + self.max_wait[priority]
+        while True:
+            wait = self._wait_time(priority, time.time())
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded(
+                    f"Strava budget exhausted, next reset in {wait:.0f}s."
+                )
+            logger.info(f"Deferring Strava request for {wait:.0f}s.")
+            self.deferred += 1
+            try:
+                await asyncio.sleep(min(wait, 5))
+            finally:
+                self.deferred -= 1
+
+    async def _wait_for_slot(self, priority: Priority) -> None:
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    async def acquire(self, priority: Priority) -> None:
+        await self._wait_for_budget(priority)
+        await self._wait_for_slot(priority)
+        self._consume()
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot passes straight to the next waiter.
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def record(self, headers, status_code: int) -> None:
+        """Updates the budgets from a Strava response."""
+        now = time.time()
+        limits = headers.get("X-RateLimit-Limit")
+        usages = headers.get("X-RateLimit-Usage")
+        if limits and usages:
+            for window, limit, usage in zip(
+                self.windows, limits.split(","), usages.split(",")
+            ):
+                window.roll(now)
+                window.limit = int(limit)
+                window.usage = max(window.usage, int(usage))
+                if self.shared:
+                    cache.set(
+                        window.cache_key,
+                        window.usage,
+                        timeout=int(window.seconds_to_reset(now)) + 1,
+                    )
+        elif status_code == 429:
+            # No headers to go on, assume the short window is spent.
+            window = self.windows[0]
+            window.roll(now)
+            window.usage = max(window.usage, window.limit)
+
+    def budget_usage(self) -> dict:
+        """Returns the current budget usage, for metrics."""
+        now = time.time()
+        usage: dict = {}
+        for window in self.windows:
+            used = self._usage(window, now)
+            usage[window.name] = {
+                "limit": window.limit,
+                "usage": used,
+                "fraction": round(used / window.limit, 3),
+                "resets_in_seconds": int(window.seconds_to_reset(now)),
+            }
+        usage["in_flight"] = self.in_flight
+        usage["queued"] = len(self._waiters)
+        usage["deferred"] = self.deferred
+        return usage
+
+
+_scheduler: RateLimitScheduler | None = None
+
+
+def get_scheduler() -> RateLimitScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RateLimitScheduler(settings.STRAVA_RATE_LIMIT)
+    return _scheduler
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import threading
+from collections.abc import Coroutine, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import httpx
+from django.conf import settings
+
+from tandarunner.ratelimit import Priority, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+_priority: ContextVar[Priority] = ContextVar(
+    "strava_priority", default=Priority.INTERACTIVE
+)
+
+_loop: asyncio.AbstractEventLoop | None = None
+_client: httpx.AsyncClient | None = None
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Returns the worker's Strava event loop, starting it on first use.
+
+    All Strava traffic goes through one loop per process so the pooled
+    client (and its keep-alive connections) is shared by every thread.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="strava-client", daemon=True
+            ).start()
+    return _loop
+
+
+def _build_client() -> httpx.AsyncClient:
+    config = settings.STRAVA_HTTP_CONFIG
+    http2 = config["http2"]
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("h2 is not installed, falling back to HTTP/1.1.")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            config["timeout"], connect=config["connect_timeout"]
+        ),
+        limits=httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+    )
+
+
+@contextmanager
+def priority(level: Priority) -> Iterator[None]:
+    """Sets the rate-limit priority of Strava requests made in the block."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+async def _send(
+    method: str, url: str, level: Priority, **kwargs
+) -> httpx.Response:
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+    scheduler = get_scheduler()
+    retries = settings.STRAVA_RATE_LIMIT["max_retries"]
+    for attempt in range(retries + 1):
+        await scheduler.acquire(level)
+        try:
+            response = await _client.request(method, url, **kwargs)
+        finally:
+            scheduler.release()
+        scheduler.record(response.headers, response.status_code)
+        if response.status_code != 429 or attempt == retries:
+            return response
+        logger.warning("Strava rate limit hit, deferring request.")
+    return response
+
+
+async def _with_priority(
+    coroutine: Coroutine[Any, Any, Any], level: Priority
+) -> Any:
+    _priority.set(level)
+    return await coroutine
+
+
+def run(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """Runs a coroutine on the Strava loop and blocks until it is done."""
+    return asyncio.run_coroutine_threadsafe(
+        _with_priority(coroutine, _priority.get()), _get_loop()
+    ).result()
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    """Sends a request through the pooled client.
+
+    Accepts any `httpx` request argument, including a per-call `timeout`.
+    """
+    loop = _get_loop()
+    coroutine = _send(method, url, _priority.get(), **kwargs)
+    if asyncio.get_running_loop() is loop:
+        return await coroutine
+    future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+    return await asyncio.wrap_future(future)
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    return run(_send(method, url, _priority.get(), **kwargs))
+
+
+def get(url: str, **kwargs) -> httpx.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> httpx.Response:
+    return request("POST", url, **kwargs)
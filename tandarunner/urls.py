@@ -5,6 +5,11 @@ from . import views
 urlpatterns = [
     path("", views.index, name="home"),
     path("partials/graphs/", views.graphs_partial, name="graphs_partial"),
+    path(
+        "partials/charts/<str:chart>/",
+        views.chart_partial,
+        name="chart_partial",
+    ),
     path("partials/stats/", views.stats_partial, name="stats_partial"),
     path("partials/chat/", views.chat_partial, name="chat_partial"),
     path("partials/plan/", views.plan_partial, name="plan_partial"),
@@ -13,4 +18,15 @@ urlpatterns = [
         views.plan_calendar,
         name="plan_calendar",
     ),
+    path(
+        "metrics/strava-rate-limit/",
+        views.strava_rate_limit,
+        name="strava_rate_limit",
+    ),
+    path("metrics/cache/", views.cache_stats, name="cache_stats"),
+    path(
+        "api/tanda-predictions/",
+        views.tanda_predictions,
+        name="tanda_predictions",
+    ),
 ]
@@ -1,21 +1,45 @@
+import functools
+import gzip
+import hashlib
+import json
 import logging
+import math
+import time
 from datetime import date
+from typing import NamedTuple
 
+import numpy
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.http import HttpRequest, HttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.template.response import TemplateResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.views.decorators.http import require_http_methods
 from icalendar import Calendar, Event
 
 from tandarunner.helpers import get_athlete_data
 from tandarunner.models import TrainingPlan
+from tandarunner.predictions import predict_tanda
+from tandarunner.ratelimit import get_scheduler
 from tandarunner.visualizations import (
+    CHARTS,
+    dummy_version,
+    get_chart,
+    get_dashboard_data,
     get_dummy_visualizations,
     get_stats,
-    get_visualizations,
 )
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,33 +52,93 @@ def index(request: HttpRequest) -> HttpResponse:
     return TemplateResponse(request, "index.html", {"athlete": ad["athlete"]})
 
 
+class _RenderedPage(NamedTuple):
+    etag: str
+    # Content-Encoding -> body, "identity" being uncompressed.
+    bodies: dict[str, bytes]
+
+
+@functools.lru_cache(maxsize=1)
+def _dummy_graphs_page(version: int) -> _RenderedPage:
+    visualizations = get_dummy_visualizations()
+    # Charts added since the dummy dashboard was saved are left out until
+    # it is saved again.
+    charts = [chart for chart in CHARTS if chart in visualizations]
+    html = render_to_string(
+        "partials/graphs.html",
+        {
+            "charts": charts,
+            "visualizations": {k: visualizations[k] for k in charts},
+        },
+    ).encode()
+
+    bodies = {"identity": html, "gzip": gzip.compress(html, mtime=0)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(html)
+    return _RenderedPage(
+        etag=hashlib.blake2b(html, digest_size=16).hexdigest(), bodies=bodies
+    )
+
+
+def _accepted_encodings(header: str) -> dict[str, float]:
+    """Content codings of an Accept-Encoding header and their q-values."""
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    return accepted
+
+
+def _dummy_graphs_response(request: HttpRequest) -> HttpResponse:
+    """Serves the anonymous graphs partial, rendered and compressed once
+    per dummy dashboard version."""
+    page = _dummy_graphs_page(dummy_version())
+    accepted = _accepted_encodings(request.headers.get("Accept-Encoding", ""))
+
+    def quality(encoding: str) -> float:
+        return accepted.get(encoding, accepted.get("*", 0.0))
+
+    # The most preferred of ours, brotli on a tie; q=0 refuses one.
+    encoding = max(
+        (
+            encoding
+            for encoding in ("br", "gzip")
+            if encoding in page.bodies and quality(encoding) > 0
+        ),
+        key=quality,
+        default="identity",
+    )
+    etag = f'"{page.etag}-{encoding}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(page.bodies[encoding])
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
 @require_http_methods(["GET"])
 def graphs_partial(request: HttpRequest) -> HttpResponse:
     if not request.user.is_authenticated:
         logger.info("Fetched dummy data for anonymous user.")
-        return TemplateResponse(
-            request,
-            "partials/graphs.html",
-            {"visualizations": get_dummy_visualizations()},
-        )
+        return _dummy_graphs_response(request)
 
     ad = get_athlete_data(request.user)
-    results = get_visualizations(ad["token"], ad["athlete_id"])
+    results = get_dashboard_data(ad["token"], ad["athlete_id"])
     logger.info("Got athlete data.")
 
-    chart_keys = {
-        "weekly_chart",
-        "rolling_tanda",
-        "marathon_predictor",
-        "running_heatmap",
-        "cumulative_yearly",
-    }
-    data = {
-        "visualizations": {
-            k: v for k, v in results.items() if k in chart_keys
-        },
-    }
-
     request.session.update(
         {
             "athlete": ad["athlete"],
@@ -63,7 +147,39 @@ def graphs_partial(request: HttpRequest) -> HttpResponse:
     )
     logger.info("Prepared graph data.")
 
-    return TemplateResponse(request, "partials/graphs.html", data)
+    # Charts are fetched one by one from chart_partial as they scroll
+    # into view.
+    return TemplateResponse(
+        request, "partials/graphs.html", {"charts": CHARTS}
+    )
+
+
+def _build_chart(user, chart: str) -> str:
+    try:
+        if not user.is_authenticated:
+            visualizations = get_dummy_visualizations()
+            if chart not in visualizations:
+                raise Http404(f"No dummy {chart} chart.")
+            return visualizations[chart]
+        ad = get_athlete_data(user)
+        return get_chart(ad["token"], ad["athlete_id"], chart)
+    finally:
+        close_old_connections()
+
+
+@require_http_methods(["GET"])
+async def chart_partial(request: HttpRequest, chart: str) -> HttpResponse:
+    if chart not in CHARTS:
+        raise Http404(f"Unknown chart {chart}.")
+
+    # Off the shared sync thread, so a page's charts build concurrently.
+    user = await request.auser()
+    spec = await sync_to_async(_build_chart, thread_sensitive=False)(
+        user, chart
+    )
+    return TemplateResponse(
+        request, "partials/chart.html", {"chart": chart, "spec": spec}
+    )
 
 
 @require_http_methods(["GET"])
@@ -72,12 +188,14 @@ def stats_partial(request: HttpRequest) -> HttpResponse:
         return TemplateResponse(request, "partials/stats.html", {})
 
     ad = get_athlete_data(request.user)
-    results = get_visualizations(ad["token"], ad["athlete_id"])
+    results = get_dashboard_data(ad["token"], ad["athlete_id"])
     stats = get_stats(ad["token"], ad["athlete_id"])
     data = {
         "stats": stats,
         "current_tanda": results["current_tanda"],
         "current_tanda_pace": results["current_tanda_pace"],
+        "tanda_windows": results.get("tanda_windows", []),
+        "race_predictions": results.get("race_predictions", []),
         "avg_hr_per_km": results["avg_hr_per_km"],
     }
     logger.info("Prepared stats data.")
@@ -124,3 +242,137 @@ def plan_calendar(request: HttpRequest, plan_id: str) -> HttpResponse:
             f'attachment; filename="{plan.name}.ics"'
         )
     return response
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def strava_rate_limit(request: HttpRequest) -> JsonResponse:
+    return JsonResponse(get_scheduler().budget_usage())
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def cache_stats(request: HttpRequest) -> JsonResponse:
+    if not hasattr(cache, "prefix_stats"):
+        return JsonResponse({"error": "Cache backend has no statistics."})
+    return JsonResponse(cache.prefix_stats())
+
+
+def _scenario_values(payload: dict, name: str) -> numpy.ndarray | None:
+    """Reads an input of the predictions API: a number, a list of numbers
+    or a {"start", "stop", "step"} range, expanded like `numpy.arange`."""
+    value = payload.get(name)
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        start, stop, step = (
+            float(value[key]) for key in ("start", "stop", "step")
+        )
+        if not all(map(math.isfinite, (start, stop, step))):
+            raise ValueError(f"{name}: expected finite numbers.")
+        if step <= 0:
+            raise ValueError(f"{name}: step must be positive.")
+        # Finite bounds can still overflow to an infinite number of steps,
+        # which fails the comparison. The range has ceil(span) values.
+        span = (stop - start) / step
+        if not span <= settings.TANDA_PREDICTIONS_MAX_SCENARIOS:
+            raise ValueError(f"{name}: range is too long.")
+        values = numpy.arange(start, stop, step)
+    else:
+        values = numpy.asarray(value, dtype="float64")
+    if values.ndim > 1 or not numpy.isfinite(values).all():
+        raise ValueError(f"{name}: expected finite numbers.")
+    return values
+
+
+def _predictions_retry_after(user) -> int:
+    """Counts a predictions API request of `user` and returns how many
+    seconds they must wait when over `TANDA_PREDICTIONS_RATE_LIMIT`, or 0.
+    Counts live in the cache so every worker shares them."""
+    limit = settings.TANDA_PREDICTIONS_RATE_LIMIT
+    now = time.time()
+    key = f"tanda-predictions-{user.pk}-{int(now // limit['seconds'])}"
+    cache.add(key, 0, timeout=limit["seconds"])
+    try:
+        usage = cache.incr(key)
+    except ValueError:
+        return 0
+    if usage <= limit["requests"]:
+        return 0
+    return math.ceil(limit["seconds"] - now % limit["seconds"])
+
+
+@require_http_methods(["POST"])
+async def tanda_predictions(request: HttpRequest) -> JsonResponse:
+    """Evaluates many Tanda scenarios at once, see `predict_tanda`.
+
+    Takes a JSON body with `km_per_week` and `pace_sec_per_km` (to predict
+    marathon times) and/or `marathon_time_hours` (to get the paces they
+    need). Inputs are paired element-wise, or crossed into a grid when
+    any of them is a range or `grid` is true; grids echo their axes.
+
+    Only signed-in athletes may call it, at most
+    `TANDA_PREDICTIONS_RATE_LIMIT` times per window.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"error": "Sign in required."}, status=401)
+    retry_after = await sync_to_async(_predictions_retry_after)(user)
+    if retry_after:
+        response = JsonResponse({"error": "Too many requests."}, status=429)
+        response["Retry-After"] = str(retry_after)
+        return response
+
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a JSON object.")
+        km_per_week = _scenario_values(payload, "km_per_week")
+        others = {
+            name: _scenario_values(payload, name)
+            for name in ("pace_sec_per_km", "marathon_time_hours")
+        }
+        others = {k: v for k, v in others.items() if v is not None}
+        if km_per_week is None or not others:
+            raise ValueError(
+                "Expected km_per_week and pace_sec_per_km or "
+                "marathon_time_hours."
+            )
+        ranges = [
+            isinstance(payload[name], dict)
+            for name in ("km_per_week", *others)
+        ]
+        grid = payload.get("grid", any(ranges))
+        if not isinstance(grid, bool):
+            raise ValueError("grid: expected true or false.")
+        scenarios = sum(
+            km_per_week.size * values.size
+            if grid
+            else math.prod(
+                numpy.broadcast_shapes(km_per_week.shape, values.shape)
+            )
+            for values in others.values()
+        )
+        if scenarios > settings.TANDA_PREDICTIONS_MAX_SCENARIOS:
+            raise ValueError(
+                f"{scenarios} scenarios, at most "
+                f"{settings.TANDA_PREDICTIONS_MAX_SCENARIOS} are allowed."
+            )
+    except (KeyError, TypeError, ValueError) as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    # Off the shared sync thread, large grids take a while.
+    predictions = await sync_to_async(predict_tanda, thread_sensitive=False)(
+        km_per_week, **others, grid=grid
+    )
+    response = {
+        "predictions": {
+            name: values.tolist() for name, values in predictions.items()
+        }
+    }
+    if grid:
+        response["axes"] = {
+            "km_per_week": km_per_week.tolist(),
+            **{name: values.tolist() for name, values in others.items()},
+        }
+    return JsonResponse(response)
@@ -1,31 +1,48 @@
+import calendar
+import functools
+import hashlib
+import json
 import logging
 import os
 import pickle
+import re
+import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any, TypedDict
 
 import altair as alt
 import numpy
 import pandas
-import requests
 from django.conf import settings
 from django.core.cache import cache
 
-from tandarunner.helpers import fetch_all_activities
+from tandarunner import strava
+from tandarunner.caching import get_or_revalidate
+from tandarunner.helpers import (
+    ACTIVITY_COLUMNS,
+    fetch_all_activities,
+    load_daily_metrics,
+    load_history,
+)
+from tandarunner.history import empty_rollups, lifetime_distance
+from tandarunner.memory import log_frame_memory
+from tandarunner.metrics import TOTALS, DailyMetrics, daily_totals
+from tandarunner.offload import run_cpu_bound
+from tandarunner.predictions import (
+    get_pace_for_distance,
+    get_tanda_value,
+    predict_races,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class VisualizationResults(TypedDict):
-    weekly_chart: Any
-    rolling_tanda: Any
-    marathon_predictor: Any
-    running_heatmap: Any
-    cumulative_yearly: Any
-    running_activities: Any
-    current_tanda: str
-    current_tanda_pace: str
-    avg_hr_per_km: str
+# Chart key (see CHARTS) -> spec JSON, plus the running_activities JSON
+# and the current_tanda, current_tanda_pace and avg_hr_per_km stats.
+VisualizationResults = dict[str, str]
 
 
 DAYS_BACK = 180
@@ -45,15 +62,20 @@ def get_stats(
     athlete_id: int,
     base_url: str = settings.STRAVA_BASE_URL,
 ) -> dict:
-    cache_key = f"stats-{athlete_id}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        logger.info("Found stats in cache.")
-        return cached
+    return get_or_revalidate(
+        f"stats-{athlete_id}",
+        lambda: _fetch_stats(access_token, athlete_id, base_url),
+        timeout=settings.CACHE_TTL_STATS,
+        max_stale=settings.CACHE_MAX_STALE_STATS,
+    )
+
 
+def _fetch_stats(access_token: str, athlete_id: int, base_url: str) -> dict:
     url = f"{base_url}/athletes/{athlete_id}/stats"
     headers = {"Authorization": f"Bearer {access_token}"}
-    stats = requests.get(url, headers=headers).json()
+    response = strava.get(url, headers=headers)
+    response.raise_for_status()
+    stats = response.json()
 
     ytd_total_meters = stats["ytd_run_totals"]["distance"]
     stats["pretty_total_kms"] = ytd_total_meters / 1000
@@ -63,83 +85,154 @@ def get_stats(
         stats["pretty_total_kms"] / weeks_elapsed, 1
     )
 
-    cache.set(cache_key, stats, timeout=settings.CACHE_TTL_STATS)
-    logger.info("Fetched and cached athlete stats.")
+    logger.info("Fetched athlete stats.")
     return stats
 
 
-def get_tanda_value(km_per_week: int, pace_sec_per_km: int) -> float:
-    marathon_distance = 42.195
-    marathon_pace_sec_per_km = (
-        17.1
-        + 140.0 * numpy.exp(-0.0053 * km_per_week)
-        + 0.55 * pace_sec_per_km
+def _join_minutes(
+    major: numpy.ndarray, minor: numpy.ndarray, valid: numpy.ndarray
+) -> numpy.ndarray:
+    text = numpy.strings.add(
+        numpy.strings.add(major.astype(str), ":"),
+        numpy.strings.zfill(minor.astype(str), 2),
     )
-    total_marathon_time_secs = marathon_distance * marathon_pace_sec_per_km
-    total_marathon_time_hours = total_marathon_time_secs / 3600
-    return total_marathon_time_hours
+    return numpy.where(valid, text, "")
+
 
+def format_pace(seconds) -> numpy.ndarray:
+    """Formats paces in seconds (per km) as m:ss, for a whole array at once.
 
-def get_pace_for_distance(
-    km_per_week: int, total_marathon_time_hours: float
-) -> float:
-    marathon_distance = 42.195
-    marathon_pace_sec_per_km = (
-        total_marathon_time_hours * 3600 / marathon_distance
+    Non-finite values become empty strings.
+    """
+    seconds = numpy.asarray(seconds, dtype="float64")
+    valid = numpy.isfinite(seconds)
+    minutes, secs = numpy.divmod(
+        numpy.where(valid, seconds, 0).astype("int64"), 60
+    )
+    return _join_minutes(minutes, secs, valid)
+
+
+def format_hours(hours) -> numpy.ndarray:
+    """Formats durations in hours as h:mm, rounded to the nearest minute,
+    for a whole array at once.
+
+    Non-finite values become empty strings.
+    """
+    hours = numpy.asarray(hours, dtype="float64")
+    valid = numpy.isfinite(hours)
+    total_minutes = numpy.floor(numpy.where(valid, hours, 0) * 60 + 0.5)
+    whole_hours, minutes = numpy.divmod(total_minutes.astype("int64"), 60)
+    return _join_minutes(whole_hours, minutes, valid)
+
+
+def format_duration(hours) -> numpy.ndarray:
+    """Formats durations in hours as h:mm:ss, or m:ss under an hour, for a
+    whole array at once.
+
+    Non-finite values become empty strings.
+    """
+    hours = numpy.asarray(hours, dtype="float64")
+    valid = numpy.isfinite(hours)
+    seconds = numpy.floor(numpy.where(valid, hours, 0) * 3600 + 0.5)
+    minutes, secs = numpy.divmod(seconds.astype("int64"), 60)
+    whole_hours, hour_minutes = numpy.divmod(minutes, 60)
+    with_hours = numpy.strings.add(
+        numpy.strings.add(
+            _join_minutes(whole_hours, hour_minutes, valid), ":"
+        ),
+        numpy.strings.zfill(secs.astype(str), 2),
+    )
+    return numpy.where(
+        whole_hours > 0, with_hours, _join_minutes(minutes, secs, valid)
     )
-    pace_sec_per_km = (
-        marathon_pace_sec_per_km
-        - 17.1
-        - 140.0 * numpy.exp(-0.0053 * km_per_week)
-    ) / 0.55
-    return pace_sec_per_km
 
 
 def pretty_marathon_time(total_marathon_time_hours: float) -> str:
-    hours = int(total_marathon_time_hours)
-    minutes = int((total_marathon_time_hours - hours) * 60)
-    seconds = int(((total_marathon_time_hours - hours) * 60 - minutes) * 60)
-    if seconds >= 30:
-        minutes += 1
-    return f"{hours}:{minutes:02d}"
-
-
-def pace_tick_formatter(value):
-    minutes = int(value // 60)
-    seconds = int(value % 60)
-    return f"{minutes}:{seconds:02d}"
-
-
-def prepare_data(all_activities: list[dict]) -> tuple:
-    cutoff = datetime.now() - timedelta(days=DAYS_BACK)
-    activities = [
-        act
-        for act in all_activities
-        if datetime.fromisoformat(act["start_date"].replace("Z", "+00:00"))
-        >= cutoff.astimezone()
-    ]
+    return str(format_hours(total_marathon_time_hours))
+
+
+@functools.cache
+def _marathon_time_grid(
+    start_hours: float,
+    stop_hours: float,
+    step_hours: float,
+    max_km_day: int,
+    km_day_step: int,
+) -> pandas.DataFrame:
+    marathon_time, km_day = numpy.meshgrid(
+        numpy.arange(start_hours, stop_hours, step_hours),
+        numpy.arange(0, max_km_day, km_day_step),
+        indexing="ij",
+    )
+    km_week = km_day * 7
+    pace = get_pace_for_distance(km_week, marathon_time)
+    return pandas.DataFrame(
+        {
+            "marathon_time": marathon_time.ravel(),
+            "km_day": km_day.ravel(),
+            "km_week": km_week.ravel(),
+            "pace": pace.ravel(),
+            "formatted_pace": format_pace(pace.ravel()),
+        }
+    )
 
-    running_activities = [act for act in activities if act["type"] == "Run"]
 
-    data = {
-        "start_date": [act["start_date"] for act in running_activities],
-        "distance_meters": [
-            float(act["distance"]) for act in running_activities
-        ],
-        "time_seconds": [act["moving_time"] for act in running_activities],
-    }
+def marathon_time_grid() -> pandas.DataFrame:
+    """Iso-marathon-time curves: the pace needed at each daily distance to
+    run each marathon time. Independent of the athlete, so it is built once
+    per process from `settings.MARATHON_TIME_GRID`; do not modify it."""
+    return _marathon_time_grid(**settings.MARATHON_TIME_GRID)
+
+
+def prepare_activities(all_activities: pandas.DataFrame) -> pandas.DataFrame:
+    """Builds the typed, date-sorted frame of runs that every chart and
+    stat is computed from."""
+    runs = all_activities.loc[all_activities["type"] == "Run"]
+    return runs.astype(ACTIVITY_COLUMNS).sort_values(
+        "start_date", ignore_index=True
+    )
 
-    df = pandas.DataFrame(data)
-    df["start_date"] = pandas.to_datetime(df["start_date"])
-    df.set_index("start_date", inplace=True)
+
+# Dtypes of the daily frame's non-float columns. Labels and formatted
+# values repeat across days, so they are stored once as categories.
+DAILY_COLUMNS = {
+    "time_seconds": "int32",
+    "type_rolling": "category",
+    "type_daily": "category",
+    "daily_pace_pretty": "category",
+    "rolling_pace_pretty": "category",
+    "pretty_rolling_tanda_day": "category",
+    "Latest run": "category",
+}
+
+
+def prepare_data(
+    runs: pandas.DataFrame, metrics: DailyMetrics | None = None
+) -> tuple:
+    cutoff = pandas.Timestamp.now(tz="UTC") - timedelta(days=DAYS_BACK)
+    running_activities = runs.iloc[runs["start_date"].searchsorted(cutoff) :]
+
+    df = pandas.DataFrame(
+        {
+            "distance_meters": running_activities["distance"].to_numpy(),
+            "time_seconds": running_activities["moving_time"].to_numpy(),
+        },
+        index=pandas.DatetimeIndex(
+            running_activities["start_date"], name="start_date"
+        ),
+    )
     weekly_data = df.resample("W").sum()
     weekly_data["distance_km"] = round(
         weekly_data["distance_meters"] / 1000, 1
     )
 
-    daily_df = df.groupby(df.index.date).sum()
-    daily_df.index = pandas.to_datetime(daily_df.index)
-    daily_df.index.name = "date"
+    # Daily totals and window sums come from the athlete's stored metrics,
+    # so windows near the cutoff still count runs from before it.
+    windows = tuple(settings.TANDA_ROLLING_WEEKS)
+    if metrics is None:
+        metrics = DailyMetrics.compute(daily_totals(runs), windows)
+    recent = metrics.frame.loc[cutoff.tz_localize(None).normalize() :]
+    daily_df = recent[TOTALS].copy()
 
     daily_df["tanda_day"] = get_tanda_value(
         daily_df["distance_meters"] / 1000 * 7,
@@ -149,39 +242,32 @@ def prepare_data(all_activities: list[dict]) -> tuple:
         daily_df["tanda_day"], unit="h"
     )
 
-    daily_df = daily_df.reset_index()
-    daily_df["date"] = pandas.to_datetime(daily_df["date"])
-    daily_df.set_index("date", inplace=True)
-
-    num_weeks = 8
-    num_days = num_weeks * 7
-    rolling = f"{num_days}d"
-
-    daily_df["rolling_distance_meters"] = (
-        daily_df["distance_meters"].rolling(window=rolling).sum()
-    )
-    daily_df["rolling_time_seconds"] = (
-        daily_df["time_seconds"].rolling(window=rolling).sum()
-    )
-
-    daily_df["rolling_km_per_week"] = (
-        daily_df["rolling_distance_meters"] / 1000 / num_weeks
-    )
-    daily_df["rolling_pace_sec_per_km"] = (
-        daily_df["rolling_time_seconds"]
-        / daily_df["rolling_distance_meters"]
-        * 1000
-    )
-
-    daily_df["rolling_tanda_day"] = get_tanda_value(
-        daily_df["rolling_km_per_week"], daily_df["rolling_pace_sec_per_km"]
+    sums = numpy.stack(
+        [
+            recent[[f"{total}_{weeks}w" for total in TOTALS]].to_numpy()
+            for weeks in windows
+        ]
     )
+    km_per_week = sums[..., 0] / 1000 / numpy.array(windows)[:, None]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        pace_sec_per_km = sums[..., 1] / sums[..., 0] * 1000
+    tanda = get_tanda_value(km_per_week, pace_sec_per_km)
+    for weeks, window_tanda in zip(windows, tanda):
+        daily_df[f"rolling_tanda_day_{weeks}w"] = window_tanda
+
+    num_weeks = settings.TANDA_WINDOW_WEEKS
+    primary = settings.TANDA_ROLLING_WEEKS.index(num_weeks)
+    daily_df["rolling_distance_meters"] = sums[primary, :, 0]
+    daily_df["rolling_time_seconds"] = sums[primary, :, 1]
+    daily_df["rolling_km_per_week"] = km_per_week[primary]
+    daily_df["rolling_pace_sec_per_km"] = pace_sec_per_km[primary]
+    daily_df["rolling_tanda_day"] = tanda[primary]
 
     daily_df["rolling_tanda_day_pretty"] = pandas.to_datetime(
         daily_df["rolling_tanda_day"], unit="h"
     )
 
-    daily_df["type_rolling"] = "Tanda (8 weeks)"
+    daily_df["type_rolling"] = f"Tanda ({num_weeks} weeks)"
     daily_df["type_daily"] = "Tanda (daily)"
 
     daily_df["pace_sec_per_km"] = daily_df["time_seconds"] / (
@@ -189,41 +275,54 @@ def prepare_data(all_activities: list[dict]) -> tuple:
     )
     daily_df["distance_km"] = daily_df["distance_meters"] / 1000
 
-    daily_df = daily_df.sort_values(by="date", ascending=True)
     daily_df["date_factor"] = numpy.exp(numpy.linspace(0, 15, len(daily_df)))
 
-    daily_df["daily_pace_pretty"] = daily_df["pace_sec_per_km"].apply(
-        lambda x: f"{int(x // 60)}:{int(x % 60):02d}"
+    daily_df["daily_pace_pretty"] = format_pace(daily_df["pace_sec_per_km"])
+    daily_df["rolling_pace_pretty"] = format_pace(
+        daily_df["rolling_pace_sec_per_km"]
     )
-    daily_df["rolling_pace_pretty"] = daily_df[
-        "rolling_pace_sec_per_km"
-    ].apply(lambda x: f"{int(x // 60)}:{int(x % 60):02d}")
 
     daily_df["rolling_km_per_week_daily_distance"] = (
         daily_df["rolling_km_per_week"] / 7
     )
 
-    daily_df["pretty_rolling_tanda_day"] = daily_df["rolling_tanda_day"].apply(
-        pretty_marathon_time
+    daily_df["pretty_rolling_tanda_day"] = format_hours(
+        daily_df["rolling_tanda_day"]
     )
     daily_df["Latest run"] = "Latest run"
 
-    return weekly_data, daily_df, pandas.DataFrame(running_activities)
+    return weekly_data, daily_df.astype(DAILY_COLUMNS), running_activities
+
+
+ChartFrames = dict[str, pandas.DataFrame]
+ChartParams = dict[str, list]
+
+# Each chart is split in two: a `_*_data` step that computes its datasets
+# and data-dependent params (scale domains), and a `_*_spec` step that
+# lays out the Altair chart from those. `render_chart` either runs both
+# through Altair or fills a precompiled template, see `SpecTemplate`.
 
 
-def viz_weekly_chart(
+def _weekly_chart_data(
     weekly_data: pandas.DataFrame,
-) -> dict:
+) -> tuple[ChartFrames, ChartParams]:
     domain = padded_time_domain(weekly_data.index)
     full_weeks = pandas.date_range(domain[0], domain[1], freq="W")
     weekly_data = weekly_data.reindex(full_weeks).fillna(0.0)
     weekly_data.index.name = "start_date"
 
     upper_limit = max(weekly_data["distance_km"].max(), 20)
+    chart_data = weekly_data.reset_index()[["start_date", "distance_km"]]
+    return {"chart_data": chart_data}, {
+        "x_domain": domain,
+        "y_domain": [0, upper_limit],
+    }
+
 
+def _weekly_chart_spec(data: dict, params: ChartParams) -> alt.TopLevelMixin:
     x = alt.X(
         "start_date:T",
-        scale=alt.Scale(domain=domain, padding=20),
+        scale=alt.Scale(domain=params["x_domain"], padding=20),
         axis=alt.Axis(
             format="%b %d",
             tickCount=alt.TimeIntervalStep(step=2, interval="week"),
@@ -233,11 +332,11 @@ def viz_weekly_chart(
     y = alt.Y(
         "distance_km:Q",
         axis=alt.Axis(title="Kilometers"),
-        scale=alt.Scale(domain=[0, upper_limit]),
+        scale=alt.Scale(domain=params["y_domain"]),
     )
 
     line_chart = (
-        alt.Chart(weekly_data.reset_index())
+        alt.Chart(data["chart_data"])
         .mark_area(
             line={"color": "#ff561b"},
             color=alt.Gradient(
@@ -263,7 +362,7 @@ def viz_weekly_chart(
     )
 
     points = (
-        alt.Chart(weekly_data.reset_index())
+        alt.Chart(data["chart_data"])
         .mark_point(
             filled=True,
             fill="white",
@@ -279,22 +378,41 @@ def viz_weekly_chart(
         )
     )
 
-    return (
-        (line_chart + points)
-        .properties(
-            width="container",
-            height=150,
-            title="Running distance per week (km)",
-        )
-        .to_json()
+    return (line_chart + points).properties(
+        width="container",
+        height=150,
+        title="Running distance per week (km)",
     )
 
 
-def viz_rolling_tanda(daily_df: pandas.DataFrame) -> dict:
+def viz_weekly_chart(weekly_data: pandas.DataFrame) -> str:
+    return render_chart(_weekly_chart_spec, *_weekly_chart_data(weekly_data))
+
+
+def _rolling_tanda_data(
+    daily_df: pandas.DataFrame,
+) -> tuple[ChartFrames, ChartParams]:
+    windows = {
+        f"rolling_tanda_day_{weeks}w": f"{weeks} weeks"
+        for weeks in settings.TANDA_ROLLING_WEEKS
+    }
+    chart_data = daily_df.reset_index()[
+        ["date", "tanda_day_pretty", *windows]
+    ].rename(columns=windows)
+    # Tanda hours as times of day, for the hours:minutes axis.
+    for column in windows.values():
+        chart_data[column] = pandas.to_datetime(chart_data[column], unit="h")
+    return {"chart_data": chart_data}, {
+        "x_domain": padded_time_domain(daily_df.index),
+        "windows": list(windows.values()),
+    }
+
+
+def _rolling_tanda_spec(data: dict, params: ChartParams) -> alt.TopLevelMixin:
     x = alt.X(
         "date:T",
         title="Date",
-        scale=alt.Scale(domain=padded_time_domain(daily_df.index), padding=20),
+        scale=alt.Scale(domain=params["x_domain"], padding=20),
         axis=alt.Axis(
             format="%b %d",
             tickCount=alt.TimeIntervalStep(step=2, interval="week"),
@@ -303,81 +421,105 @@ def viz_rolling_tanda(daily_df: pandas.DataFrame) -> dict:
     color = "#d65de0"
 
     daily_line = (
-        alt.Chart(daily_df.reset_index())
+        alt.Chart(data["chart_data"])
         .mark_point(shape="square", filled=True, opacity=0.3)
         .encode(
             x=x,
             y=alt.Y("hoursminutes(tanda_day_pretty):O", title="Tanda day"),
             color=alt.value(color),
             tooltip=[
-                alt.Tooltip("tanda_day_pretty", timeUnit="hoursminutes"),
-                alt.Tooltip("date", timeUnit="yearmonthdate"),
+                alt.Tooltip("tanda_day_pretty:T", timeUnit="hoursminutes"),
+                alt.Tooltip("date:T", timeUnit="yearmonthdate"),
             ],
         )
     )
-    rolling_line = (
-        alt.Chart(daily_df.reset_index())
+    rolling_lines = (
+        alt.Chart(data["chart_data"])
+        .transform_fold(params["windows"], as_=["window", "rolling_tanda"])
         .mark_line(interpolate="basis")
         .encode(
             x=x,
             y=alt.Y(
-                "hoursminutes(rolling_tanda_day_pretty):O",
-                title="Tanda trend (8 weeks)",
+                "hoursminutes(rolling_tanda):O",
+                title="Tanda trend",
+            ),
+            color=alt.Color(
+                "window:N",
+                title="Rolling window",
+                sort=params["windows"],
+                scale=alt.Scale(scheme="purples", reverse=True),
             ),
-            color=alt.value(color),
             tooltip=[
-                alt.Tooltip(
-                    "rolling_tanda_day_pretty", timeUnit="hoursminutes"
-                ),
-                alt.Tooltip("date", timeUnit="yearmonthdate"),
+                alt.Tooltip("window:N", title="Window"),
+                alt.Tooltip("rolling_tanda:T", timeUnit="hoursminutes"),
+                alt.Tooltip("date:T", timeUnit="yearmonthdate"),
             ],
         )
     )
 
     return (
-        (daily_line + rolling_line)
+        (daily_line + rolling_lines)
         .properties(
             width="container",
             height=250,
-            title="Tanda day vs. 8-week rolling Tanda day",
+            title="Tanda day vs. rolling Tanda day",
         )
         .configure_legend(orient="top")
-    ).to_json()
+    )
 
 
-def running_heatmap(daily_df: pandas.DataFrame) -> dict:
-    daily_df["day_of_the_week_name"] = daily_df.index.strftime("%a")
-    heatmap_data = daily_df[
-        [
-            "day_of_the_week_name",
-            "distance_km",
-        ]
-    ].copy()
-
-    heatmap_end = heatmap_data.index.max()
-    heatmap_start = heatmap_end - timedelta(days=DAYS_BACK)
-    all_days = pandas.date_range(heatmap_start, heatmap_end, freq="D")
-    heatmap_data = heatmap_data.reindex(all_days).fillna(0.0)
-    heatmap_data["day_of_the_week_name"] = heatmap_data.index.strftime("%a")
-    heatmap_data["week_start"] = heatmap_data.index - pandas.to_timedelta(
-        heatmap_data.index.weekday, unit="D"
-    )
-    heatmap_data["week_label"] = heatmap_data["week_start"].dt.strftime(
-        "%Y-W%W"
+def viz_rolling_tanda(daily_df: pandas.DataFrame) -> str:
+    return render_chart(_rolling_tanda_spec, *_rolling_tanda_data(daily_df))
+
+
+_WEEKDAY_NAMES = numpy.array(calendar.day_abbr)
+_MONTH_NAMES = numpy.array(calendar.month_abbr[1:])
+
+
+def _heatmap_data(
+    daily_df: pandas.DataFrame, days: int = DAYS_BACK
+) -> tuple[ChartFrames, ChartParams]:
+    """Lays the last `days` days out on a weeks x weekdays grid.
+
+    Cells are found from integer day offsets, so only the few week labels
+    are formatted as strings and the cost hardly grows with `days`.
+    """
+    end = daily_df.index.max()
+    start = end - timedelta(days=days)
+    offsets = (daily_df.index - start).days.to_numpy()
+    shown = offsets >= 0
+    distance_km = numpy.zeros(days + 1)
+    distance_km[offsets[shown]] = daily_df["distance_km"].to_numpy()[shown]
+
+    # Cells of the grid flattened row by row, counted from the Monday of
+    # the first week shown.
+    week, weekday = numpy.divmod(numpy.arange(days + 1) + start.weekday(), 7)
+    first_monday = start - timedelta(days=start.weekday())
+    week_labels = pandas.date_range(
+        first_monday, periods=week[-1] + 1, freq="7D"
+    ).strftime("%Y-W%W")
+    dates = pandas.date_range(start, end, freq="D")
+
+    upper_limit = distance_km.mean() + distance_km.std(ddof=1) * 1.5
+
+    chart_data = pandas.DataFrame(
+        {
+            "week_label": numpy.asarray(week_labels)[week],
+            "day_of_the_week_name": _WEEKDAY_NAMES[weekday],
+            "month": _MONTH_NAMES[dates.month.to_numpy() - 1],
+            "day_of_the_month": dates.day.to_numpy(),
+            "distance_km": distance_km,
+        }
     )
-    heatmap_data["month"] = heatmap_data.index.strftime("%b")
-    heatmap_data["day_of_the_month"] = heatmap_data.index.day
-    heatmap_data["ran"] = heatmap_data["distance_km"] > 0
+    return {"chart_data": chart_data}, {"color_domain": [0, upper_limit]}
 
-    upper_limit = (
-        heatmap_data["distance_km"].mean()
-        + heatmap_data["distance_km"].std() * 1.5
-    )
 
-    day_order = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+def _heatmap_spec(data: dict, params: ChartParams) -> alt.TopLevelMixin:
+    day_order = _WEEKDAY_NAMES.tolist()
 
     rest_days = (
-        alt.Chart(heatmap_data[~heatmap_data["ran"]])
+        alt.Chart(data["chart_data"])
+        .transform_filter("datum.distance_km <= 0")
         .mark_rect(cornerRadius=2, color="#e0e0e0")
         .encode(
             x=alt.X(
@@ -403,7 +545,8 @@ def running_heatmap(daily_df: pandas.DataFrame) -> dict:
     )
 
     run_days = (
-        alt.Chart(heatmap_data[heatmap_data["ran"]])
+        alt.Chart(data["chart_data"])
+        .transform_filter("datum.distance_km > 0")
         .mark_rect(cornerRadius=2)
         .encode(
             x=alt.X(
@@ -424,7 +567,7 @@ def running_heatmap(daily_df: pandas.DataFrame) -> dict:
             color=alt.Color(
                 "distance_km:Q",
                 scale=alt.Scale(
-                    domain=[0, upper_limit],
+                    domain=params["color_domain"],
                     scheme="lightorange",
                 ),
                 legend=None,
@@ -445,34 +588,57 @@ def running_heatmap(daily_df: pandas.DataFrame) -> dict:
         .configure_view(stroke=None)
     )
 
-    return (
-        heatmap.properties(
-            width="container",
-            height=150,
-            title="Running heatmap",
-        ).interactive()
-    ).to_json()
+    return heatmap.properties(
+        width="container",
+        height=150,
+        title="Running heatmap",
+    ).interactive()
 
 
-def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
-    pace_ticks_values = list(range(240, 60 * 8, 15))
+def running_heatmap(daily_df: pandas.DataFrame) -> str:
+    return render_chart(_heatmap_spec, *_heatmap_data(daily_df))
+
 
+def _marathon_predictor_data(
+    daily_df: pandas.DataFrame,
+) -> tuple[ChartFrames, ChartParams]:
     last_date = max(daily_df.index)
     start_date = last_date - timedelta(days=56)
-    daily_df["shape"] = daily_df.index.to_series().apply(
-        lambda x: "square" if x == last_date else "circle"
-    )
     min_pace, max_pace = (
         daily_df["pace_sec_per_km"].min(),
         daily_df["pace_sec_per_km"].max(),
     )
+    window = daily_df.loc[start_date:last_date].reset_index()[
+        [
+            "date",
+            "distance_km",
+            "pace_sec_per_km",
+            "daily_pace_pretty",
+            "date_factor",
+            "rolling_km_per_week_daily_distance",
+            "rolling_pace_sec_per_km",
+            "rolling_pace_pretty",
+            "pretty_rolling_tanda_day",
+        ]
+    ]
+    window["is_latest"] = window["date"] == last_date
+
+    times_df = marathon_time_grid()[
+        ["marathon_time", "km_day", "pace", "formatted_pace"]
+    ]
+    return {"window": window, "times": times_df}, {
+        "pace_domain": [min_pace, max_pace],
+        "km_day_domain": [0, window["distance_km"].max()],
+    }
+
+
+def _marathon_predictor_spec(
+    data: dict, params: ChartParams
+) -> alt.TopLevelMixin:
+    pace_ticks_values = list(range(240, 60 * 8, 15))
 
     daily_line = (
-        alt.Chart(
-            daily_df.loc[start_date:last_date]
-            .reset_index()
-            .sort_values("date")
-        )
+        alt.Chart(data["window"])
         .mark_point(
             filled=True,
             size=70,
@@ -488,7 +654,7 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
                 scale=alt.Scale(
                     reverse=True,
                     zero=False,
-                    domain=(min_pace, max_pace),
+                    domain=params["pace_domain"],
                 ),
                 title="Pace (mm:ss)",
                 axis=alt.Axis(
@@ -511,38 +677,14 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
         )
     )
 
-    marathon_times = []
-
-    for marathon_time in numpy.arange(2.5, 4.5, 0.25):
-        for km_day in range(0, 50, 1):
-            km_week = km_day * 7
-            pace = get_pace_for_distance(km_week, marathon_time)
-            formatted_pace = pace_tick_formatter(pace)
-            marathon_times.append(
-                {
-                    "marathon_time": marathon_time,
-                    "km_day": km_day,
-                    "km_week": km_week,
-                    "pace": pace,
-                    "formatted_pace": formatted_pace,
-                }
-            )
-
-    times_df = pandas.DataFrame(marathon_times)
-
     marathon_times = (
-        alt.Chart(times_df)
+        alt.Chart(data["times"])
         .mark_line(interpolate="basis")
         .encode(
             x=alt.X(
                 "km_day:Q",
                 title="Daily Distance (km)",
-                scale=alt.Scale(
-                    domain=[
-                        0,
-                        daily_df.loc[start_date:last_date].distance_km.max(),
-                    ]
-                ),
+                scale=alt.Scale(domain=params["km_day_domain"]),
             ),
             y=alt.Y(
                 "pace:Q",
@@ -550,7 +692,7 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
                 scale=alt.Scale(
                     reverse=True,
                     zero=False,
-                    domain=(min_pace, max_pace),
+                    domain=params["pace_domain"],
                 ),
                 axis=alt.Axis(
                     values=pace_ticks_values,
@@ -571,8 +713,6 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
         )
     )
 
-    daily_df["Legend"] = "Tanda Progression line"
-
     tooltip = [
         alt.Tooltip(
             "rolling_km_per_week_daily_distance:Q",
@@ -588,11 +728,8 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
     ]
 
     tanda_progression = (
-        alt.Chart(
-            daily_df.loc[start_date:last_date]
-            .reset_index()
-            .sort_values("date")
-        )
+        alt.Chart(data["window"])
+        .transform_calculate(Legend="'Tanda Progression line'")
         .mark_line(point=True, strokeWidth=2)
         .encode(
             x=alt.X(
@@ -606,7 +743,7 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
                 scale=alt.Scale(
                     reverse=True,
                     zero=False,
-                    domain=(min_pace, max_pace),
+                    domain=params["pace_domain"],
                 ),
                 axis=alt.Axis(
                     values=pace_ticks_values,
@@ -614,7 +751,7 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
                 ),
             ),
             tooltip=tooltip,
-            order="date",
+            order="date:T",
             color=alt.Color(
                 "Legend:N",
                 legend=alt.Legend(title=None),
@@ -625,14 +762,10 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
         )
     )
 
-    daily_df["Legend"] = "Current form"
     current_form = (
-        alt.Chart(
-            daily_df.loc[start_date:last_date]
-            .reset_index()
-            .sort_values("date")
-            .tail(1)
-        )
+        alt.Chart(data["window"])
+        .transform_filter("datum.is_latest")
+        .transform_calculate(Legend="'Current form'")
         .mark_point(filled=True, size=70, color="#FFAA00")
         .encode(
             x=alt.X(
@@ -646,7 +779,7 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
                 scale=alt.Scale(
                     reverse=True,
                     zero=False,
-                    domain=(min_pace, max_pace),
+                    domain=params["pace_domain"],
                 ),
                 axis=alt.Axis(
                     values=pace_ticks_values,
@@ -662,15 +795,14 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
         )
     )
 
-    # Create a dataset for the labels
-    label_data = times_df[times_df["km_day"] == 10].copy()
-    label_data["label"] = label_data["marathon_time"].apply(
-        lambda x: f"{int(x)}:{int((x % 1) * 60):02d}"
-    )
-
-    # Add text labels
+    # Label each iso-time curve at 10 km/day, reusing the grid dataset
     text_labels = (
-        alt.Chart(label_data)
+        alt.Chart(data["times"])
+        .transform_filter("datum.km_day == 10")
+        .transform_calculate(
+            label="floor(datum.marathon_time) + ':' + "
+            "pad(round(datum.marathon_time % 1 * 60), 2, '0', 'left')"
+        )
         .mark_text(
             align="center",
             baseline="middle",
@@ -705,35 +837,150 @@ def marathon_predictor(daily_df: pandas.DataFrame) -> dict:
         )
         .interactive()
         .configure_legend(orient="top")
-    ).to_json()
+    )
+
 
+def marathon_predictor(daily_df: pandas.DataFrame) -> str:
+    return render_chart(
+        _marathon_predictor_spec, *_marathon_predictor_data(daily_df)
+    )
 
-def viz_cumulative_yearly_distance(all_activities: list) -> str:
-    running = [act for act in all_activities if act["type"] == "Run"]
 
-    data = {
-        "date": [act["start_date"] for act in running],
-        "distance_km": [float(act["distance"]) / 1000 for act in running],
+def _race_predictions_data(
+    daily_df: pandas.DataFrame,
+) -> tuple[ChartFrames, ChartParams]:
+    races = list(settings.RACE_DISTANCES_KM)
+    distances_km = numpy.array(list(settings.RACE_DISTANCES_KM.values()))
+
+    # Every day and distance in one pass: (days, races) arrays, flattened
+    # day by day into the chart's long format.
+    hours = predict_races(daily_df["rolling_tanda_day"], distances_km)
+    pace = hours * 3600 / distances_km
+    chart_data = pandas.DataFrame(
+        {
+            "date": numpy.repeat(daily_df.index, len(races)),
+            "race": numpy.tile(races, len(daily_df)),
+            "pace_sec_per_km": pace.ravel(),
+            "race_time": format_duration(hours.ravel()),
+            "race_pace": format_pace(pace.ravel()),
+        }
+    )
+    chart_data = chart_data[numpy.isfinite(pace.ravel())]
+    return {"chart_data": chart_data}, {
+        "x_domain": padded_time_domain(daily_df.index),
+        "races": races,
     }
 
-    df = pandas.DataFrame(data)
-    df["date"] = pandas.to_datetime(df["date"])
-    df["year"] = df["date"].dt.year
-    df["day_of_year"] = df["date"].dt.dayofyear
 
-    daily = (
-        df.groupby(["year", "day_of_year"])["distance_km"].sum().reset_index()
+def _race_predictions_spec(
+    data: dict, params: ChartParams
+) -> alt.TopLevelMixin:
+    chart = (
+        alt.Chart(data["chart_data"])
+        .mark_line(interpolate="basis")
+        .encode(
+            x=alt.X(
+                "date:T",
+                title="Date",
+                scale=alt.Scale(domain=params["x_domain"], padding=20),
+                axis=alt.Axis(
+                    format="%b %d",
+                    tickCount=alt.TimeIntervalStep(step=2, interval="week"),
+                ),
+            ),
+            y=alt.Y(
+                "pace_sec_per_km:Q",
+                title="Race pace (min/km)",
+                scale=alt.Scale(zero=False, reverse=True),
+                axis=alt.Axis(
+                    labelExpr="timeFormat(datum.value * 1000, '%M:%S')"
+                ),
+            ),
+            color=alt.Color(
+                "race:N",
+                title="Race",
+                sort=params["races"],
+                scale=alt.Scale(scheme="oranges", reverse=True),
+            ),
+            tooltip=[
+                alt.Tooltip("race:N", title="Race"),
+                alt.Tooltip("race_time:N", title="Predicted time"),
+                alt.Tooltip("race_pace:N", title="Pace (mm:ss/km)"),
+                alt.Tooltip("date:T", timeUnit="yearmonthdate"),
+            ],
+        )
+    )
+
+    return chart.properties(
+        width="container",
+        height=250,
+        title="Race predictions",
+    ).configure_legend(orient="top")
+
+
+def race_predictions(daily_df: pandas.DataFrame) -> str:
+    """Predicted pace over `settings.RACE_DISTANCES_KM` from the rolling
+    Tanda marathon prediction of every day, see `predict_races`."""
+    return render_chart(
+        _race_predictions_spec, *_race_predictions_data(daily_df)
+    )
+
+
+def _downsample_yearly(
+    year: pandas.Series, day_of_year: pandas.Series
+) -> numpy.ndarray:
+    """Which points of the sorted yearly cumulative curves to draw.
+
+    Keeps each year's first point and the last point of every bin of
+    days, so a year has at most `settings.CUMULATIVE_POINTS_PER_YEAR`
+    points plus its start. The curves only grow, so the last point of a
+    bin is exact and the line between bins stays close to the full one.
+    """
+    budget = settings.CUMULATIVE_POINTS_PER_YEAR
+    bin_days = -(-366 // budget)
+    year = year.to_numpy()
+    key = year * budget + (day_of_year.to_numpy() - 1) // bin_days
+    keep = numpy.ones(len(key), dtype=bool)
+    keep[:-1] = key[1:] != key[:-1]
+    keep[1:] |= year[1:] != year[:-1]
+    return keep
+
+
+def _cumulative_yearly_data(
+    history: pandas.DataFrame,
+) -> tuple[ChartFrames, ChartParams]:
+    dates = history.index
+    daily = pandas.DataFrame(
+        {
+            "year": dates.year,
+            "day_of_year": dates.dayofyear,
+            "distance_km": history["distance_meters"].to_numpy() / 1000,
+        }
     )
-    daily = daily.sort_values(["year", "day_of_year"])
     daily["cumulative_km"] = daily.groupby("year")["distance_km"].cumsum()
+    daily = daily[_downsample_yearly(daily["year"], daily["day_of_year"])]
     daily["year_str"] = daily["year"].astype(str)
 
-    years = sorted(daily["year"].unique())
+    # The last three years stand out, older ones are there to compare
+    # against by picking them in the legend.
+    years = sorted(daily["year_str"].unique())
     year_colors = ["#d4d4d4", "#f59e0b", "#ff561b"]
-    color_map = {str(y): year_colors[i] for i, y in enumerate(years[-3:])}
+    color_map = {year: "#ececec" for year in years[:-3]}
+    color_map.update(zip(years[-3:], year_colors))
+
+    chart_data = daily[["day_of_year", "cumulative_km", "year_str"]]
+    return {"chart_data": chart_data}, {
+        "color_domain": list(color_map.keys()),
+        "color_range": list(color_map.values()),
+    }
 
+
+def _cumulative_yearly_spec(
+    data: dict, params: ChartParams
+) -> alt.TopLevelMixin:
+    picked_years = alt.selection_point(fields=["year_str"], bind="legend")
     chart = (
-        alt.Chart(daily)
+        alt.Chart(data["chart_data"])
         .mark_line(strokeWidth=2)
         .encode(
             x=alt.X(
@@ -750,38 +997,253 @@ def viz_cumulative_yearly_distance(all_activities: list) -> str:
                 "year_str:N",
                 title="Year",
                 scale=alt.Scale(
-                    domain=list(color_map.keys()),
-                    range=list(color_map.values()),
+                    domain=params["color_domain"],
+                    range=params["color_range"],
                 ),
             ),
+            opacity=alt.condition(
+                picked_years, alt.value(1.0), alt.value(0.15)
+            ),
             tooltip=[
                 alt.Tooltip("year_str:N", title="Year"),
                 alt.Tooltip("day_of_year:Q", title="Day"),
                 alt.Tooltip("cumulative_km:Q", title="Km", format=".0f"),
             ],
         )
+        .add_params(picked_years)
     )
 
-    return (
-        chart.properties(
-            width="container",
-            height=250,
-            title="Cumulative Yearly Distance",
-        ).configure_legend(orient="top")
-    ).to_json()
+    return chart.properties(
+        width="container",
+        height=250,
+        title="Cumulative Yearly Distance",
+    ).configure_legend(orient="top", columns=8)
+
+
+def viz_cumulative_yearly_distance(history: pandas.DataFrame) -> str:
+    """`history` is run distance per period over the athlete's lifetime,
+    see `history.lifetime_distance`."""
+    return render_chart(
+        _cumulative_yearly_spec, *_cumulative_yearly_data(history)
+    )
+
+
+_MARKER = re.compile(r'"@@(\w+)@@"')
+_UNITS_PER_SECOND = {"s": 1, "ms": 10**3, "us": 10**6, "ns": 10**9}
+
+
+def _marker(name: str) -> str:
+    return f"@@{name}@@"
+
+
+def _unwrap_markers(spec: Any) -> Any:
+    """Turns the one-item marker lists used as stand-in params into bare
+    markers, so the whole param is substituted in the template."""
+    if isinstance(spec, dict):
+        return {k: _unwrap_markers(v) for k, v in spec.items()}
+    if isinstance(spec, list):
+        if len(spec) == 1 and _MARKER.fullmatch(json.dumps(spec[0])):
+            return spec[0]
+        return [_unwrap_markers(v) for v in spec]
+    return spec
+
+
+def records_json(frame: pandas.DataFrame) -> str:
+    """Serializes a frame as Vega-Lite inline data: a JSON list of
+    records, datetimes as ISO strings and NaN as null."""
+    columns = {}
+    for column, dtype in frame.dtypes.items():
+        if isinstance(dtype, pandas.DatetimeTZDtype):
+            values = frame[column].dt.tz_convert(None).to_numpy()
+            timezone = "UTC"
+        elif dtype.kind == "M":
+            values = frame[column].to_numpy()
+            timezone = "naive"
+        else:
+            continue
+        unit, _ = numpy.datetime_data(values.dtype)
+        # Whole seconds are written without a fraction, as Altair does.
+        # Naive values keep no offset, so Vega-Lite reads them as local.
+        if not (values.view("int64") % _UNITS_PER_SECOND[unit]).any():
+            unit = "s"
+        columns[column] = numpy.datetime_as_string(
+            values, unit=unit, timezone=timezone
+        )
+    if columns:
+        frame = frame.assign(**columns)
+    return frame.to_json(orient="records", double_precision=15)
+
+
+class SpecTemplate:
+    """A chart's Vega-Lite spec, built and validated by Altair once.
+
+    Datasets are referenced by name and the data-dependent params are
+    markers in the serialized spec, so rendering only serializes the
+    frames and substitutes them into the text, without Altair.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[dict, ChartParams], alt.TopLevelMixin],
+        datasets: tuple[str, ...],
+        params: tuple[str, ...],
+    ):
+        spec = build(
+            {name: alt.Data(name=name) for name in datasets},
+            {name: [_marker(name)] for name in params},
+        ).to_dict()
+        spec["datasets"] = {name: _marker(name) for name in datasets}
+        self.text = json.dumps(_unwrap_markers(spec))
+
+    def render(self, frames: ChartFrames, params: ChartParams) -> str:
+        values = {name: records_json(frame) for name, frame in frames.items()}
+        values.update(
+            (name, json.dumps(value)) for name, value in params.items()
+        )
+        return _MARKER.sub(lambda match: values[match.group(1)], self.text)
+
+
+@functools.cache
+def _spec_template(
+    build: Callable[[dict, ChartParams], alt.TopLevelMixin],
+    datasets: tuple[str, ...],
+    params: tuple[str, ...],
+) -> SpecTemplate:
+    return SpecTemplate(build, datasets, params)
+
+
+def render_chart(
+    build: Callable[[dict, ChartParams], alt.TopLevelMixin],
+    frames: ChartFrames,
+    params: ChartParams,
+) -> str:
+    """Renders a chart spec to JSON, see `settings.CHART_SPEC_MODE`."""
+    if settings.CHART_SPEC_MODE == "altair":
+        return build(frames, params).to_json()
+    template = _spec_template(build, tuple(frames), tuple(params))
+    return template.render(frames, params)
+
+
+def fingerprint(df: pandas.DataFrame) -> str:
+    """Content hash of a frame: values, index, column names and dtypes."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.dtypes.items())).encode())
+    digest.update(pandas.util.hash_pandas_object(df).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# Settings the chart builders read besides their input frame.
+CHART_SETTINGS = (
+    "CHART_SPEC_MODE",
+    "CUMULATIVE_POINTS_PER_YEAR",
+    "RACE_DISTANCES_KM",
+    "TANDA_ROLLING_WEEKS",
+    "TANDA_WINDOW_WEEKS",
+)
+
+
+@functools.cache
+def _chart_code_version() -> bytes:
+    """Hash of the code charts are built with: this module, the
+    predictions it draws and the Altair version."""
+    digest = hashlib.blake2b(digest_size=16)
+    for module in (__name__, get_tanda_value.__module__):
+        digest.update(Path(sys.modules[module].__file__).read_bytes())
+    digest.update(alt.__version__.encode())
+    return digest.digest()
+
+
+def chart_version() -> str:
+    """Hash of everything besides the input frame that shapes a chart, so
+    cached specs are rebuilt when the code or `CHART_SETTINGS` change."""
+    digest = hashlib.blake2b(_chart_code_version(), digest_size=8)
+    digest.update(
+        repr([getattr(settings, name) for name in CHART_SETTINGS]).encode()
+    )
+    return digest.hexdigest()
+
+
+def cached_chart(
+    name: str, build: Callable[[pandas.DataFrame], Any], data: pandas.DataFrame
+) -> Any:
+    """Builds a chart spec, cached under a fingerprint of its input frame
+    and the `chart_version`.
+
+    Charts are pure functions of their input, so an unchanged frame always
+    maps to the same spec, whichever athlete or request it comes from.
+    The build itself runs in the chart process pool when enabled.
+    """
+    cache_key = f"chart-{name}-{chart_version()}-{fingerprint(data)}"
+    chart = cache.get(cache_key)
+    if chart is not None:
+        logger.info(f"Found {name} chart in cache.")
+        return chart
+
+    chart = run_cpu_bound(build, data)
+    cache.set(cache_key, chart, timeout=settings.CACHE_TTL_CHARTS)
+    return chart
+
+
+class DashboardData(TypedDict):
+    history: pandas.DataFrame
+    weekly_data: pandas.DataFrame
+    daily_df: pandas.DataFrame
+    running_activities: str
+    current_tanda: str
+    current_tanda_pace: str
+    tanda_windows: list[dict]
+    race_predictions: list[dict]
+    avg_hr_per_km: str
+
 
+# Chart key -> (builder, DashboardData frame it is built from).
+CHARTS: dict[str, tuple[Callable[[pandas.DataFrame], Any], str]] = {
+    "weekly_chart": (viz_weekly_chart, "weekly_data"),
+    "running_heatmap": (running_heatmap, "daily_df"),
+    "rolling_tanda": (viz_rolling_tanda, "daily_df"),
+    "marathon_predictor": (marathon_predictor, "daily_df"),
+    "race_predictions": (race_predictions, "daily_df"),
+    "cumulative_yearly": (viz_cumulative_yearly_distance, "history"),
+}
 
-def get_visualizations(
-    access_token: str, athlete_id: int
-) -> VisualizationResults:
-    cache_key = f"viz-{athlete_id}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        logger.info("Found viz data in cache.")
-        return cached
 
+def get_dashboard_data(access_token: str, athlete_id: int) -> DashboardData:
+    return get_or_revalidate(
+        f"dashboard-{athlete_id}",
+        lambda: _build_dashboard_data(access_token, athlete_id),
+        timeout=settings.CACHE_TTL_VISUALIZATIONS,
+        max_stale=settings.CACHE_MAX_STALE_VISUALIZATIONS,
+    )
+
+
+def _build_dashboard_data(access_token: str, athlete_id: int) -> DashboardData:
     all_activities = fetch_all_activities(access_token, athlete_id=athlete_id)
-    weekly_data, daily_df, running_activities = prepare_data(all_activities)
+    metrics = load_daily_metrics(athlete_id)
+    rollups = load_history(athlete_id)
+    data = run_cpu_bound(
+        prepare_dashboard_data, all_activities, metrics, rollups
+    )
+
+    if athlete_id == settings.DUARTE_ATHLETE_ID:
+        file_path = _dummy_path()
+        # Written aside and swapped in, so readers never see half a file.
+        with open(f"{file_path}.tmp", "wb") as f:
+            pickle.dump(visualizations_from(data), f)
+        os.replace(f"{file_path}.tmp", file_path)
+        logger.info("Saved dummy data from Duarte.")
+
+    return data
+
+
+def prepare_dashboard_data(
+    all_activities: pandas.DataFrame,
+    metrics: DailyMetrics | None = None,
+    rollups: pandas.DataFrame | None = None,
+) -> DashboardData:
+    runs = prepare_activities(all_activities)
+    if rollups is None:
+        rollups = empty_rollups()
+    weekly_data, daily_df, running_activities = prepare_data(runs, metrics)
     logger.info("Prepared data.")
 
     tanda_series = daily_df["rolling_tanda_day"].dropna()
@@ -789,13 +1251,39 @@ def get_visualizations(
         latest_tanda = tanda_series.iloc[-1]
         current_tanda = pretty_marathon_time(latest_tanda)
         pace_secs = latest_tanda * 3600 / 42.195
-        current_tanda_pace = (
-            f"{int(pace_secs // 60)}:{int(pace_secs % 60):02d}/km"
-        )
+        current_tanda_pace = f"{format_pace(pace_secs)}/km"
     else:
         current_tanda = "N/A"
         current_tanda_pace = "N/A"
 
+    # Latest prediction for every race distance, e.g. for "10K 44:50".
+    race_predictions = []
+    if not tanda_series.empty:
+        distances_km = numpy.array(list(settings.RACE_DISTANCES_KM.values()))
+        hours = predict_races(latest_tanda, distances_km)
+        race_predictions = [
+            {"race": race, "time": str(time), "pace": f"{pace}/km"}
+            for race, time, pace in zip(
+                settings.RACE_DISTANCES_KM,
+                format_duration(hours),
+                format_pace(hours * 3600 / distances_km),
+            )
+        ]
+
+    # Latest prediction of every rolling window, e.g. for "4w 3:25".
+    latest = daily_df.iloc[-1] if len(daily_df) else None
+    tanda_windows = [
+        {
+            "weeks": weeks,
+            "marathon_time": pretty_marathon_time(
+                latest[f"rolling_tanda_day_{weeks}w"]
+            ),
+        }
+        for weeks in settings.TANDA_ROLLING_WEEKS
+        if latest is not None
+        and pandas.notna(latest[f"rolling_tanda_day_{weeks}w"])
+    ]
+
     hr_data = running_activities[["average_heartrate", "distance"]].dropna()
     if not hr_data.empty:
         total_hr_weighted = (
@@ -807,47 +1295,78 @@ def get_visualizations(
     else:
         avg_hr_per_km = "N/A"
 
-    results: VisualizationResults = {
-        "weekly_chart": viz_weekly_chart(weekly_data),
-        "rolling_tanda": viz_rolling_tanda(daily_df=daily_df),
-        "marathon_predictor": marathon_predictor(daily_df=daily_df),
-        "running_heatmap": running_heatmap(daily_df=daily_df),
-        "cumulative_yearly": viz_cumulative_yearly_distance(all_activities),
-        "running_activities": clean_df(
-            pandas.DataFrame(
-                [act for act in all_activities if act["type"] == "Run"]
-            )
-        ).to_json(),
+    data: DashboardData = {
+        "history": lifetime_distance(rollups, runs),
+        "weekly_data": weekly_data,
+        "daily_df": daily_df,
+        "running_activities": clean_df(runs).to_json(),
         "current_tanda": current_tanda,
         "current_tanda_pace": current_tanda_pace,
+        "tanda_windows": tanda_windows,
+        "race_predictions": race_predictions,
         "avg_hr_per_km": avg_hr_per_km,
     }
+    log_frame_memory("Dashboard", data)
+    return data
 
-    if athlete_id == settings.DUARTE_ATHLETE_ID:
-        file_path = os.path.join(
-            f"{settings.STATICFILES_DIRS[0]}/dummy/", "temp_viz.pkl"
-        )
 
-        with open(file_path, "wb") as f:
-            pickle.dump(results, f)
-        logger.info("Saved dummy data from Duarte.")
+def build_chart(chart: str, data: DashboardData) -> str:
+    builder, frame = CHARTS[chart]
+    return cached_chart(chart, builder, data[frame])
+
+
+def build_charts(data: DashboardData) -> dict[str, str]:
+    """Builds every chart, concurrently."""
+    with ThreadPoolExecutor(
+        max_workers=len(CHARTS), thread_name_prefix="chart"
+    ) as executor:
+        futures = {
+            chart: executor.submit(build_chart, chart, data)
+            for chart in CHARTS
+        }
+        return {chart: future.result() for chart, future in futures.items()}
+
+
+def get_chart(access_token: str, athlete_id: int, chart: str) -> str:
+    return build_chart(chart, get_dashboard_data(access_token, athlete_id))
 
-    cache.set(cache_key, results, timeout=settings.CACHE_TTL_VISUALIZATIONS)
-    logger.info("Ran computation for graphs and set cache.")
 
+def visualizations_from(data: DashboardData) -> VisualizationResults:
+    results: VisualizationResults = {
+        **build_charts(data),
+        "running_activities": data["running_activities"],
+        "current_tanda": data["current_tanda"],
+        "current_tanda_pace": data["current_tanda_pace"],
+        "avg_hr_per_km": data["avg_hr_per_km"],
+    }
+    logger.info("Ran computation for graphs.")
     return results
 
 
-def get_dummy_visualizations() -> VisualizationResults:
-    file_path = os.path.join(
+def _dummy_path() -> str:
+    return os.path.join(
         f"{settings.STATICFILES_DIRS[0]}/dummy/", "temp_viz.pkl"
     )
-    with open(file_path, "rb") as f:
+
+
+def dummy_version() -> int:
+    """Changes whenever the dummy dashboard is rewritten."""
+    return os.stat(_dummy_path()).st_mtime_ns
+
+
+@functools.lru_cache(maxsize=1)
+def _load_dummy_visualizations(version: int) -> VisualizationResults:
+    with open(_dummy_path(), "rb") as f:
         return pickle.load(f)
 
 
+def get_dummy_visualizations() -> VisualizationResults:
+    """The demo dashboard, unpickled once per process (and again only if
+    the file is rewritten). Shared between callers; do not modify it."""
+    return _load_dummy_visualizations(dummy_version())
+
+
 def clean_df(df: pandas.DataFrame) -> pandas.DataFrame:
-    df = df.copy()
     columns = {
         "name": "name",
         "sport_type": "sport_type",
@@ -861,7 +1380,7 @@ def clean_df(df: pandas.DataFrame) -> pandas.DataFrame:
 
     for col in columns.keys():
         if col not in df.columns:
-            df[col] = numpy.nan
             logger.warning(f"Column {col} not found in DataFrame.")
 
-    return df[columns.keys()].rename(columns=columns, inplace=False)
+    # Copies only the kept columns, missing ones come back as NaN.
+    return df.reindex(columns=list(columns)).rename(columns=columns)
@@ -0,0 +1,32 @@
+import os
+
+import django
+import pytest
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.db import transaction  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+
+@pytest.fixture(scope="session")
+def django_db_setup():
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    yield
+    teardown_databases(databases, verbosity=0)
+    teardown_test_environment()
+
+
+@pytest.fixture
+def db(django_db_setup):
+    """Runs the test in a transaction that is rolled back afterwards."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
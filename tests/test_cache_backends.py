@@ -0,0 +1,21 @@
+from tandarunner.cache_backends import DiskCache, key_prefix
+
+
+def test_key_prefix():
+    assert key_prefix("chart-weekly_chart-abc") == "chart-"
+    assert key_prefix("session") == "other"
+
+
+def test_prefix_stats(tmp_path):
+    cache = DiskCache(
+        str(tmp_path), {"SHARDS": 4, "OPTIONS": {"size_limit": 2**20}}
+    )
+    cache.set("chart-a", "spec")
+    cache.get("chart-a")
+    cache.get("chart-b")
+
+    stats = cache.prefix_stats()
+
+    assert stats["size_limit_bytes"] == 2**20
+    assert stats["entries"] == 1
+    assert stats["prefixes"]["chart-"] == {"sets": 1, "hits": 1, "misses": 1}
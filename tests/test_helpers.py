@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.conf import settings
+from django.utils import timezone as django_timezone
+
+from tandarunner import helpers
+
+
+def activity(activity_id: int, start: datetime, distance: float) -> dict:
+    return {
+        "id": activity_id,
+        "name": "Run",
+        "type": "Run",
+        "sport_type": "Run",
+        "start_date": start.isoformat(),
+        "start_date_local": start.isoformat(),
+        "distance": distance,
+        "moving_time": int(distance * 0.3),
+        "average_speed": 3.3,
+        "average_heartrate": None,
+        "max_heartrate": None,
+    }
+
+
+@pytest.fixture
+def strava(monkeypatch):
+    """Fakes Strava with a mutable list of activities and a movable
+    clock, starting now."""
+
+    class Strava:
+        now = datetime.now(timezone.utc)
+        activities: list[dict] = []
+
+        def since(self, after: int) -> list[dict]:
+            return [
+                a
+                for a in self.activities
+                if datetime.fromisoformat(a["start_date"]).timestamp() > after
+            ]
+
+    fake = Strava()
+    monkeypatch.setattr(django_timezone, "now", lambda: fake.now)
+    monkeypatch.setattr(
+        helpers,
+        "_fetch_historical_activities",
+        lambda token, after: fake.since(after),
+    )
+    monkeypatch.setattr(
+        helpers,
+        "_fetch_activity_chunk",
+        lambda token, after, before: fake.since(after),
+    )
+    return fake
+
+
+def test_reconcile_drops_activities_missing_from_refetch(db, strava):
+    strava.activities = [
+        activity(1, strava.now - timedelta(days=30), 10000.0),
+        activity(2, strava.now - timedelta(days=20), 12000.0),
+        activity(3, strava.now - timedelta(days=1), 8000.0),
+    ]
+    helpers._sync_activities("token", 1)
+
+    # Deleted on Strava. A delta sync only asks for the latest days.
+    del strava.activities[0]
+    strava.now += timedelta(hours=3)
+    assert 1 in set(helpers._sync_activities("token", 1)["id"])
+
+    strava.now += timedelta(seconds=settings.ACTIVITIES_RECONCILE_INTERVAL)
+    activities = helpers._sync_activities("token", 1)
+
+    assert list(activities["id"]) == [2, 3]
+    metrics = helpers.load_daily_metrics(1)
+    assert metrics.frame["distance_meters"].sum() == 20000.0
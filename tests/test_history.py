@@ -0,0 +1,51 @@
+import pandas
+
+from tandarunner.history import empty_rollups, roll_over
+
+
+def activities(*days: str) -> pandas.DataFrame:
+    return pandas.DataFrame(
+        {
+            "id": range(1, len(days) + 1),
+            "type": "Run",
+            "start_date": pandas.to_datetime(list(days), utc=True),
+            "distance": 10000.0,
+            "moving_time": 3000,
+        }
+    )
+
+
+def test_roll_over_moves_old_runs_into_rollups():
+    rollups, kept = roll_over(
+        empty_rollups(),
+        activities("2020-03-01 07:00", "2020-03-01 18:00", "2024-05-01 07:00"),
+        activity_start=pandas.Timestamp("2023-01-01", tz="UTC"),
+        weekly_start=pandas.Timestamp("2010-01-01", tz="UTC"),
+    )
+
+    assert list(kept["id"]) == [3]
+    assert rollups.loc["2020-03-01", "distance_meters"] == 20000
+    assert rollups.loc["2020-03-01", "runs"] == 2
+
+
+def test_roll_over_counts_refetched_runs_once():
+    # Each sync fetches a few days before the latest run again, so the run
+    # rolled over by the first sync comes back with the second one.
+    fetched = activities("2022-12-30 07:00", "2023-01-01 07:00")
+    rollups, kept = roll_over(
+        empty_rollups(),
+        fetched,
+        activity_start=pandas.Timestamp("2023-01-01", tz="UTC"),
+        weekly_start=pandas.Timestamp("2010-01-01", tz="UTC"),
+    )
+    rollups, kept = roll_over(
+        rollups,
+        fetched,
+        activity_start=pandas.Timestamp("2023-01-02", tz="UTC"),
+        weekly_start=pandas.Timestamp("2010-01-02", tz="UTC"),
+        rolled_until=pandas.Timestamp("2023-01-01", tz="UTC"),
+    )
+
+    assert kept.empty
+    assert rollups["distance_meters"].sum() == 20000
+    assert list(rollups["runs"]) == [1, 1]
@@ -0,0 +1,123 @@
+import numpy
+import pandas
+import pytest
+
+from tandarunner.metrics import TOTALS, DailyMetrics, daily_totals
+
+WINDOWS = (4, 8, 12, 16)
+
+
+@pytest.fixture
+def totals() -> pandas.DataFrame:
+    """Two years of daily run totals, with about every other day off."""
+    rng = numpy.random.default_rng(0)
+    days = pandas.date_range("2024-01-01", periods=730, freq="D")
+    days = days[rng.random(len(days)) < 0.6]
+    distance = rng.uniform(4000, 21000, len(days))
+    runs = pandas.DataFrame(
+        {
+            "start_date": (days + pandas.Timedelta(hours=7)).tz_localize(
+                "UTC"
+            ),
+            "distance": distance,
+            "moving_time": (distance * 0.3).astype("int64"),
+        }
+    )
+    return daily_totals(runs)
+
+
+def assert_metrics_equal(actual: DailyMetrics, expected: DailyMetrics):
+    pandas.testing.assert_frame_equal(
+        actual.frame, expected.frame, rtol=1e-9, check_freq=False
+    )
+
+
+def test_compute_matches_pandas_rolling(totals):
+    metrics = DailyMetrics.compute(totals, WINDOWS)
+
+    for weeks in WINDOWS:
+        columns = [f"{total}_{weeks}w" for total in TOTALS]
+        pandas.testing.assert_frame_equal(
+            metrics.frame[columns],
+            totals.rolling(f"{weeks * 7}D").sum().set_axis(columns, axis=1),
+            check_dtype=False,
+            check_freq=False,
+        )
+
+
+def test_update_matches_compute(totals):
+    # One sync per day, each recomputing the last three days.
+    metrics = DailyMetrics.compute(totals.iloc[:1], WINDOWS)
+    for day in totals.index[1:]:
+        since = day - pandas.Timedelta(days=3)
+        metrics = metrics.update(totals.loc[since:day], since)
+        assert_metrics_equal(
+            metrics, DailyMetrics.compute(totals.loc[:day], WINDOWS)
+        )
+
+
+def test_trim_matches_compute_of_kept_days(totals):
+    first_day = totals.index[200]
+
+    trimmed = DailyMetrics.compute(totals, WINDOWS).trim(first_day)
+
+    expected = DailyMetrics.compute(totals.loc[first_day:], WINDOWS)
+    pandas.testing.assert_frame_equal(
+        trimmed.frame[expected.frame.columns[:4]],
+        expected.frame[expected.frame.columns[:4]],
+        rtol=1e-9,
+        check_freq=False,
+    )
+
+
+def test_update_after_trim_reads_base_from_first_day(totals):
+    # A sync reaching back to the first kept day has no stored row before
+    # the longest window, so the running totals start from the first row.
+    first_day = totals.index[200]
+    kept = totals.loc[first_day:]
+    metrics = DailyMetrics.compute(kept.iloc[:10], WINDOWS).trim(first_day)
+    since = kept.index[5]
+
+    updated = metrics.update(kept.loc[since : kept.index[40]], since)
+
+    assert_metrics_equal(
+        updated, DailyMetrics.compute(kept.loc[: kept.index[40]], WINDOWS)
+    )
+
+
+def test_update_of_metrics_trimmed_without_rebasing(totals):
+    # Metrics stored with cumulative sums that still count trimmed days
+    # keep counting them, but only kept days fall in the updated windows.
+    first_day = totals.index[200]
+    full = DailyMetrics.compute(totals.loc[: totals.index[300]], WINDOWS)
+    metrics = DailyMetrics(full.frame.loc[first_day:], WINDOWS)
+    since = totals.index[205]
+
+    updated = metrics.update(totals.loc[since : totals.index[400]], since)
+
+    last_day = totals.index[400]
+    expected = DailyMetrics.compute(totals.loc[:last_day], WINDOWS)
+    kept = DailyMetrics.compute(totals.loc[first_day:last_day], WINDOWS)
+    columns = list(updated.frame.columns)
+    pandas.testing.assert_frame_equal(
+        updated.frame[columns[:4]],
+        expected.frame.loc[first_day:, columns[:4]],
+        rtol=1e-9,
+        check_freq=False,
+    )
+    pandas.testing.assert_frame_equal(
+        updated.frame.loc[since:, columns[4:]],
+        kept.frame.loc[since:, columns[4:]],
+        rtol=1e-9,
+        check_freq=False,
+    )
+
+
+def test_dumps_round_trip(totals):
+    metrics = DailyMetrics.compute(totals, WINDOWS)
+
+    restored = DailyMetrics.loads(metrics.dumps(), WINDOWS)
+
+    assert_metrics_equal(restored, metrics)
+    assert DailyMetrics.loads(metrics.dumps(), (4, 8)) is None
+    assert DailyMetrics.loads(None, WINDOWS) is None
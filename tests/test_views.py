@@ -0,0 +1,45 @@
+import json
+
+import numpy
+import pytest
+
+from tandarunner.views import _accepted_encodings, _scenario_values
+
+
+def test_scenario_values_expands_ranges():
+    values = _scenario_values(
+        {"km_per_week": {"start": 20, "stop": 50, "step": 10}},
+        "km_per_week",
+    )
+
+    numpy.testing.assert_array_equal(values, [20, 30, 40])
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        '{"km_per_week": {"start": 0, "stop": 1e309, "step": 1}}',
+        '{"km_per_week": {"start": 0, "stop": Infinity, "step": 1}}',
+        '{"km_per_week": {"start": 0, "stop": 10, "step": NaN}}',
+        '{"km_per_week": [40, Infinity]}',
+        '{"km_per_week": {"start": 0, "stop": 10, "step": 0}}',
+        '{"km_per_week": {"start": 0, "stop": 1e9, "step": 1}}',
+        '{"km_per_week": {"start": -1e300, "stop": 1e300, "step": 1e-300}}',
+    ],
+)
+def test_scenario_values_rejects_bad_input(body):
+    with pytest.raises(ValueError):
+        _scenario_values(json.loads(body), "km_per_week")
+
+
+def test_accepted_encodings_reads_q_values():
+    assert _accepted_encodings("gzip, br;q=0, *;q=0.5") == {
+        "gzip": 1.0,
+        "br": 0.0,
+        "*": 0.5,
+    }
+    assert _accepted_encodings("GZIP;q=0.8 , deflate;q=x") == {
+        "gzip": 0.8,
+        "deflate": 0.0,
+    }
+    assert _accepted_encodings("") == {}
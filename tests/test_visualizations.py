@@ -0,0 +1,13 @@
+from django.test import override_settings
+
+from tandarunner.visualizations import chart_version
+
+
+def test_chart_version_follows_chart_settings():
+    version = chart_version()
+
+    assert chart_version() == version
+    with override_settings(CUMULATIVE_POINTS_PER_YEAR=12):
+        assert chart_version() != version
+    with override_settings(RACE_DISTANCES_KM={"5K": 5.0}):
+        assert chart_version() != version